@@ -0,0 +1,69 @@
+import numpy as np
+
+from consts import ALIGN_COARSE_SIZE, ALIGN_POINTS_ITERATIONS
+
+
+def raster_offset(reference, alpha):
+    levels = [(reference.astype(np.float32), alpha.astype(np.float32))]
+    while max(*levels[-1][0].shape, *levels[-1][1].shape) > ALIGN_COARSE_SIZE:
+        levels.append((_downsample(levels[-1][0]), _downsample(levels[-1][1])))
+
+    dx, dy = _fft_offset(*levels[-1])
+    for level_reference, level_alpha in reversed(levels[:-1]):
+        dx, dy = _refine_offset(level_reference, level_alpha, 2 * dx, 2 * dy)
+
+    return dx, dy
+
+
+def points_offset(reference_index, points):
+    reference_points = reference_index.points[:reference_index.end_count]
+    if len(reference_points) == 0 or len(points) == 0:
+        return 0, 0
+
+    offset = reference_points.mean(axis=0) - points.mean(axis=0)
+    for _ in range(ALIGN_POINTS_ITERATIONS):
+        _, idxs = reference_index.nearest_many(points + offset)
+        matched = idxs < reference_index.end_count
+        if not matched.any():
+            break
+
+        step = np.median(reference_points[idxs[matched]] - (points[matched] + offset), axis=0)
+        offset += step
+        if np.abs(step).max() < 1e-9:
+            break
+
+    return offset[0], offset[1]
+
+
+def _downsample(pixels):
+    height, width = pixels.shape[0] // 2 * 2, pixels.shape[1] // 2 * 2
+    return pixels[:height, :width].reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3))
+
+
+def _fft_offset(reference, alpha):
+    from scipy import fft
+
+    shape = [fft.next_fast_len(r + a - 1, real=True) for r, a in zip(reference.shape, alpha.shape)]
+    correlation = fft.irfft2(fft.rfft2(reference, shape) * np.conj(fft.rfft2(alpha, shape)), shape)
+
+    dy, dx = np.unravel_index(np.argmax(correlation), correlation.shape)
+    if dy >= reference.shape[0]:
+        dy -= shape[0]
+    if dx >= reference.shape[1]:
+        dx -= shape[1]
+
+    return int(dx), int(dy)
+
+
+def _refine_offset(reference, alpha, dx, dy):
+    candidates = [(dx + i, dy + j) for j in (-1, 0, 1) for i in (-1, 0, 1)]
+    return max(candidates, key=lambda offset: _overlap_product(reference, alpha, *offset))
+
+
+def _overlap_product(reference, alpha, dx, dy):
+    x0, y0 = max(0, dx), max(0, dy)
+    x1, y1 = min(reference.shape[1], dx + alpha.shape[1]), min(reference.shape[0], dy + alpha.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return 0
+
+    return np.einsum('ij,ij->', reference[y0:y1, x0:x1], alpha[y0 - dy:y1 - dy, x0 - dx:x1 - dx])
@@ -1,68 +1,111 @@
+import math
 import os
 import tkinter as tk
-from tkinter import filedialog, font, messagebox, colorchooser, ttk
+from tkinter import filedialog, font, messagebox, colorchooser, simpledialog, ttk
+
+import numpy as np
 
 from consts import *
 from point import *
-from svg import Svg
+from align import points_offset, raster_offset
+from compare import deviation_stats, diff_stats, match_points, raster_diff
+from compositor import Compositor
+from export import TiledExport, export_layers
+from layers import LayerList
+from layers_panel import LayersPanel
+from perf import perf
+from raster_cache import raster_cache
+from svg import file_stat, load_alpha, load_svg, reload_svg, tint
+from workers import Workers
 
 
 class SVGComparator:
     def __init__(self, root):
         self.root = root
+        self.init_state()
 
         self.canvas_frame = tk.Frame(root)
         self.canvas_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.canvas = tk.Canvas(self.canvas_frame, bg='white', borderwidth=0, highlightthickness=0)
-        self.canvas.images = {}  # Against GC
         self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
-        _create_grid(self.canvas)
-
-        self.layers_frame = tk.Frame(root)
-        _add_layers_canvas_tag(self.layers_frame)
-        self.layers_frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
-        self.layers_canvas = tk.Canvas(self.layers_frame)
-        _add_layers_canvas_tag(self.layers_canvas)
-        self.layers_vscrollbar = tk.Scrollbar(self.layers_frame, orient=tk.VERTICAL,
-                                              command=self.layers_canvas.yview)
-        self.layers_hscrollbar = tk.Scrollbar(self.layers_frame, orient=tk.HORIZONTAL,
-                                              command=self.layers_canvas.xview)
-
-        self.layers_list = tk.Frame(self.layers_canvas)
-        _add_layers_canvas_tag(self.layers_list)
-        self.layers_list.bind(
-            '<Configure>',
-            lambda e: self.layers_canvas.configure(scrollregion=self.layers_canvas.bbox(tk.ALL))
+        self.progressbar = ttk.Progressbar(self.canvas_frame, orient=tk.HORIZONTAL, mode='determinate')
+        self.status_label = tk.Label(self.canvas_frame, anchor=tk.W)
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas)
+        self.diff_label = tk.Label(self.canvas_frame, anchor=tk.W)
+
+        self.layers_panel = LayersPanel(
+            root, self.layers,
+            toggle_selection=self.toggle_layer_selection,
+            toggle_visibility=self.toggle_layer_visibility,
+            move_up=lambda svg: self.move_layer_up(self.layers.idx(svg)),
+            move_down=lambda svg: self.move_layer_down(self.layers.idx(svg)),
+            set_color=self.set_svg_color,
+            set_opacity=self.set_svg_opacity,
+            close=self.close_svg,
         )
-        self.layers_canvas.create_window((0, 0), window=self.layers_list, anchor=tk.NW)
-        self.layers_canvas.configure(yscrollcommand=self.layers_vscrollbar.set)
-        self.layers_canvas.configure(xscrollcommand=self.layers_hscrollbar.set)
+        self.layers_panel.frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
+        self.frame_font = font.Font(size=18)
+        self.points_checkbutton_flag = tk.BooleanVar(value=self.points_visible)
+        self.diff_checkbutton_flag = tk.BooleanVar(value=False)
+        self.deviation_checkbutton_flag = tk.BooleanVar(value=False)
+        self.perf_checkbutton_flag = tk.BooleanVar(value=perf.enabled)
+        self.watch_checkbutton_flag = tk.BooleanVar(value=False)
 
-        self.layers_hscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
-        self.layers_vscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.layers_canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.create_menu()
+        self.bind_events()
 
+        if perf.enabled:
+            self.update_perf_overlay()
+
+    def init_state(self):
         self.scale = 10
-        self.svgs = {}
-        self.ordered_svgs = []
+        self.layers = LayerList()
         self.points_visible = True
-        self.points_checkbutton_flag = tk.BooleanVar(value=self.points_visible)
+        self.diff_layers = []
+        self.diff_image = None
+        self.deviation_layers = []
+        self.deviation_match = None
+        self.deviation_image = None
         self.drag_data = Point(0, 0)
-        self.selected_layers = set()
 
         self.canvas_scroll_timer_id = None
+        self.canvas_preview_timer_id = None
+        self.compositor = Compositor()
+        self.composite_image = None
+        self.composite_timer_id = None
+        self.points_scales = {}
+        self.drawn_points = {}
+        self.lod_images = {}
         self.canvas_opacity_timer_ids = {}
-
-        self.create_menu()
-        self.bind_events()
+        self.moving_layers = []
+        self.move_delta = Point(0, 0)
+        self.move_offset = Point(0, 0)
+        self.move_timer_id = None
+        self.move_end_timer_id = None
+        self.selection_image = None
+        self.perf_timer_id = None
+        self.grid_image = None
+        self.grid_key = None
+        self.export_job = None
+        self.watch_timer_id = None
+        self.watch_pending = {}
+        self.workers = Workers(self.root)
+
+        self.layers.subscribe(self.on_layers_changed)
 
     def create_menu(self):
         menubar = tk.Menu(self.root)
-        file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label='Open SVGs', command=self.open_svgs)
-        file_menu.add_separator()
-        file_menu.add_command(label='Exit', command=self.root.quit)
-        menubar.add_cascade(label='File', menu=file_menu)
+        self.file_menu = tk.Menu(menubar, tearoff=0)
+        self.file_menu.add_command(label='Open SVGs', command=self.open_svgs)
+        self.file_menu.add_checkbutton(label='Watch Files', variable=self.watch_checkbutton_flag,
+                                       command=self.toggle_watch)
+        self.file_menu.add_command(label='Export Comparison', command=self.export_comparison)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label='Export Performance Stats', command=lambda: self.export_perf(chrome=False))
+        self.file_menu.add_command(label='Export Performance Trace', command=lambda: self.export_perf(chrome=True))
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label='Exit', command=self.root.quit)
+        menubar.add_cascade(label='File', menu=self.file_menu)
 
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_command(label='Scale Up', command=self.scale_up)
@@ -73,9 +116,17 @@ class SVGComparator:
         view_menu.add_command(label='Move Up', command=lambda: self.move_canvas(DIR_UP))
         view_menu.add_command(label='Move Down', command=lambda: self.move_canvas(DIR_DOWN))
         view_menu.add_command(label='Move to Origin', command=self.move_layers_to_origin)
+        view_menu.add_command(label='Auto-align by Raster', command=lambda: self.auto_align_layers(by_points=False))
+        view_menu.add_command(label='Auto-align by Points', command=lambda: self.auto_align_layers(by_points=True))
         view_menu.add_separator()
         view_menu.add_checkbutton(label='Show Control Points', variable=self.points_checkbutton_flag,
                                   command=self.toggle_point_visibility)
+        view_menu.add_checkbutton(label='Show Difference', variable=self.diff_checkbutton_flag,
+                                  command=self.toggle_difference)
+        view_menu.add_checkbutton(label='Show Point Deviations', variable=self.deviation_checkbutton_flag,
+                                  command=self.toggle_deviations)
+        view_menu.add_checkbutton(label='Show Performance Stats', variable=self.perf_checkbutton_flag,
+                                  command=self.toggle_perf_overlay)
         menubar.add_cascade(label='View', menu=view_menu)
 
         self.root.config(menu=menubar)
@@ -97,28 +148,28 @@ class SVGComparator:
         self.canvas.bind('<ButtonPress-1>', self.on_canvas_click)
         self.canvas.bind('<Double-Button-1>', lambda _: self.move_layers_to_origin())
         self.canvas.bind('<B1-Motion>', self.on_canvas_drag)
-        self.layers_canvas.bind_class('LayersCanvas', '<MouseWheel>', self.on_layers_canvas_vscroll)
-        self.layers_canvas.bind_class('LayersCanvas', '<Shift-MouseWheel>', self.on_layers_canvas_hscroll)
+        self.canvas.bind('<ButtonRelease-1>', lambda _: self._end_move())
+        self.canvas.bind('<Configure>', lambda _: self.on_canvas_resize())
+        self.canvas.bind('<Motion>', self.on_canvas_hover)
+        self.canvas.bind('<Leave>', lambda _: self.status_label.configure(text=''))
 
     def open_svgs(self):
         trying = True
         already_opened = []
+        to_load = []
 
         while trying:
             filenames = filedialog.askopenfilenames(filetypes=[('SVG files', '*.svg')])
             trying = False
             if filenames:
                 for filename in filenames:
-                    if filename in self.svgs.keys():
-                        already_opened.append((filename, self._svg_idx(self.svgs[filename].id)))
+                    opened = self.layers.by_filename(filename)
+                    if opened is not None:
+                        already_opened.append((filename, self.layers.idx(opened)))
                         continue
 
-                    svg = Svg(filename)
-                    self.svgs[filename] = svg
-                    self.ordered_svgs.append(svg)
-                    self.selected_layers.add(svg)
-                    self.update_canvas()
-                    self.add_to_layers_list(svg)
+                    if filename not in to_load:
+                        to_load.append(filename)
 
                 if len(already_opened) > 0:
                     trying = messagebox.askretrycancel(
@@ -129,209 +180,371 @@ class SVGComparator:
                     )
                     already_opened.clear()
 
-    def add_to_layers_list(self, svg):
-        idx = len(self.layers_list.winfo_children())
+        if len(to_load) > 0:
+            self.load_svgs(to_load)
+
+    def load_svgs(self, filenames):
+        scale = self.scale
+
+        def on_progress(done, total):
+            self.progressbar.configure(maximum=total, value=done)
+
+        def on_loaded(results):
+            self.progressbar.pack_forget()
+            self.file_menu.entryconfigure('Open SVGs', state=tk.NORMAL)
+
+            failed = []
+            for filename, result in zip(filenames, results):
+                if not isinstance(result, tuple):
+                    failed.append((filename, result))
+                    continue
+
+                svg, alpha = result
+                raster_cache.put(svg.key, scale, alpha)
+                self.layers.append(svg)
+
+            if len(failed) > 0:
+                messagebox.showerror(
+                    title='Error',
+                    message='These SVGs could not be opened',
+                    detail=f',{os.linesep}{os.linesep}'.join(map(lambda f: f'{f[0]} ({f[1]})', failed)),
+                )
+
+        self.file_menu.entryconfigure('Open SVGs', state=tk.DISABLED)
+        self.progressbar.configure(maximum=len(filenames), value=0)
+        self.progressbar.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas)
+        self.workers.map('open', on_loaded, load_svg, [(filename, scale) for filename in filenames],
+                         progress=on_progress)
+
+    def toggle_watch(self):
+        if self.watch_checkbutton_flag.get():
+            self.watch_files()
+        else:
+            self.root.after_cancel(self.watch_timer_id)
+            self.watch_timer_id = None
+            self.watch_pending.clear()
+
+    def watch_files(self):
+        self.watch_timer_id = self.root.after(WATCH_POLL_DELAY, self.watch_files)
+
+        for svg in self.layers:
+            stat = file_stat(svg.filename)
+            if stat is None or stat == svg.stat:
+                self.watch_pending.pop(svg.id, None)
+            elif self.watch_pending.get(svg.id) != stat:
+                self.watch_pending[svg.id] = stat
+            else:
+                self.watch_pending.pop(svg.id)
+                svg.stat = stat
+                self.reload_svg(svg)
+
+    def reload_svg(self, svg):
+        scale = self.scale
+
+        def on_reloaded(results):
+            result = results[0]
+            if svg not in self.layers:
+                return
+
+            if not isinstance(result, tuple):
+                self.status_label.configure(text=f'Could not reload {svg.filename}: {result}')
+                return
+
+            stat, new_svg, alpha = result
+            svg.stat = stat
+            if new_svg is None:
+                return
+
+            old_key = svg.key
+            svg.update_geometry(new_svg)
+            self._release_raster(old_key)
+            raster_cache.put(svg.key, scale, alpha)
+            self._update_raster_hidden(svg.key)
+            self.layers.update(svg)
+
+        self.workers.map(f'{svg.id}.reload', on_reloaded, reload_svg, [(svg.filename, svg.key, scale)],
+                         pinned=True)
+
+    def export_comparison(self):
+        if not any(svg.visible for svg in self.layers):
+            messagebox.showinfo(title='Export Comparison', message='There are no visible layers to export')
+            return
+
+        scale = simpledialog.askinteger('Export Comparison', 'Scale', initialvalue=self.scale, minvalue=1)
+        if scale is None:
+            return
+
+        filename = filedialog.asksaveasfilename(defaultextension='.png', filetypes=[('PNG', '*.png')])
+        if not filename:
+            return
 
-        layer_frame = tk.Frame(self.layers_list)
-        _add_layers_canvas_tag(layer_frame)
+        try:
+            self.export_job = TiledExport(filename, export_layers(self.layers, scale, self.scale),
+                                          self.workers.executor, 2 * os.cpu_count())
+        except (OSError, ValueError) as e:
+            messagebox.showerror(title='Error', message='The comparison could not be exported', detail=str(e))
+            return
 
-        button_frame = tk.Frame(layer_frame)
-        _add_layers_canvas_tag(button_frame)
+        self.file_menu.entryconfigure('Export Comparison', state=tk.DISABLED)
+        self.progressbar.configure(maximum=len(self.export_job.strips), value=0)
+        self.progressbar.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas)
+        self.poll_export()
+
+    def poll_export(self):
+        try:
+            done = self.export_job.poll()
+        except Exception as e:
+            done = True
+            messagebox.showerror(title='Error', message='The comparison could not be exported', detail=str(e))
+
+        if not done:
+            self.progressbar.configure(value=self.export_job.written)
+            self.root.after(WORKERS_POLL_DELAY, self.poll_export)
+            return
 
-        idx_label = tk.Label(button_frame, text=f'#{idx + 1}')
-        _add_layers_canvas_tag(idx_label)
-        idx_label.pack(side=tk.TOP)
+        self.export_job = None
+        self.progressbar.pack_forget()
+        self.file_menu.entryconfigure('Export Comparison', state=tk.NORMAL)
 
-        def set_checkbutton(checkbutton, selected):
-            if selected:
-                checkbutton.select()
-            else:
-                checkbutton.deselect()
-
-        tick = tk.Checkbutton(button_frame, command=lambda: self.toggle_layer_selection(
-            svg,
-            lambda selected: set_checkbutton(tick, selected),
-        ))
-        if svg in self.selected_layers:
-            tick.select()
-        _add_layers_canvas_tag(tick)
-        tick.pack(side=tk.TOP)
-
-        def set_eye_button_text(button, visible):
-            button.configure(text=('👁' if visible else '🚫'))
-
-        eye_button = tk.Button(button_frame, command=lambda: self.toggle_layer_visibility(
-            svg,
-            lambda visible: set_eye_button_text(eye_button, visible),
-        ))
-        set_eye_button_text(eye_button, True)
-        _add_layers_canvas_tag(eye_button)
-        eye_button.pack(side=tk.TOP)
-
-        if idx > 0:
-            prev_down_button = self.layers_list.winfo_children()[idx - 1].down_button
-            prev_down_button['state'] = tk.NORMAL
-        up_button = tk.Button(button_frame, text='🔼', command=lambda: self.move_layer_up(idx))
-        _add_layers_canvas_tag(up_button)
-        if svg.id == self.ordered_svgs[0].id:
-            up_button['state'] = tk.DISABLED
-        up_button.pack(side=tk.TOP)
-        down_button = tk.Button(button_frame, text='🔽', command=lambda: self.move_layer_down(idx))
-        _add_layers_canvas_tag(down_button)
-        down_button['state'] = tk.DISABLED
-        down_button.pack(side=tk.TOP)
-
-        color_button = tk.Button(button_frame, text='🖌️', command=lambda: self.set_svg_color(svg))
-        _add_layers_canvas_tag(color_button)
-        color_button.pack(side=tk.TOP)
-
-        close_button = tk.Button(button_frame, text='❌', command=lambda: self.close_svg(svg, idx))
-        _add_layers_canvas_tag(close_button)
-        close_button.pack(side=tk.TOP)
-
-        button_frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
-
-        description_frame = tk.Frame(layer_frame)
-        _add_layers_canvas_tag(description_frame)
-
-        opacity_frame = tk.Frame(layer_frame)
-        _add_layers_canvas_tag(opacity_frame)
-
-        opacity_label = tk.Label(opacity_frame, anchor=tk.N, width=3)
-        _add_layers_canvas_tag(opacity_label)
-
-        def update_opacity_label(val):
-            opacity_label.configure(text=str(int(val * 100)))
-
-        update_opacity_label(svg.opacity)
-
-        opacity_scale = ttk.Scale(opacity_frame, orient=tk.VERTICAL,
-                                  from_=0, to=1,
-                                  value=svg.opacity,
-                                  command=lambda val: self.set_svg_opacity(svg, float(val), update_opacity_label))
-        _add_layers_canvas_tag(opacity_scale)
-
-        opacity_scale.pack(side=tk.TOP, fill=tk.Y, expand=True)
-        opacity_label.pack(side=tk.TOP, fill=tk.X, expand=False)
-
-        opacity_frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
-
-        def add_line(text, margin=False, **kwargs):
-            text_frame = tk.Frame(description_frame)
-            _add_layers_canvas_tag(text_frame)
-            text_frame.pack(side=tk.TOP, fill=tk.X, expand=True)
-            label = tk.Label(text_frame, text=text, **kwargs)
-            _add_layers_canvas_tag(label)
-            label.pack(side=tk.LEFT, pady=((0, 5) if margin else (0, 0)))
-
-        filename_last_sep = svg.filename.rfind(os.sep)
-        if filename_last_sep == -1:
-            add_line(svg.filename, font=font.Font(weight='bold'))
-        else:
-            add_line(svg.filename[:filename_last_sep + 1], font=font.Font(weight='bold'))
-            add_line(svg.filename[filename_last_sep + 1:], font=font.Font(weight='bold'))
-        add_line(f'End points: {len(svg.end_points)}')
-        add_line(f'Internal points: {len(svg.int_points)}', margin=True)
-        add_line(f'Commands: {svg.cmd_quans["all"]}')
-        add_line(f'Moves: {svg.cmd_quans["move"]}')
-        add_line(f'Lines: {svg.cmd_quans["line"]}')
-        add_line(f'Cubic beziers: {svg.cmd_quans["cubic"]}')
-        add_line(f'Quadratic beziers: {svg.cmd_quans["quadratic"]}')
-        add_line(f'Arcs: {svg.cmd_quans["arc"]}')
-
-        description_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
-
-        layer_frame.pack(side=tk.TOP, fill=tk.X, expand=True, pady=(0, 10))
-        layer_frame.tick = tick
-        layer_frame.up_button = up_button
-        layer_frame.down_button = down_button
-        layer_frame.filename = svg.filename
-
-    def toggle_layer_visibility(self, svg, set_eye_button_text):
+    def toggle_layer_visibility(self, svg):
         svg.visible = not svg.visible
-        set_eye_button_text(svg.visible)
+        self._update_raster_hidden(svg.key)
 
         if svg.visible:
-            self.update_canvas_starting(svg)
+            self.redraw_layer(svg)
         else:
             self.canvas.delete(svg.id)
+            self._clear_points(svg)
+            self._schedule_composite()
 
-    def toggle_layer_selection(self, svg, set_tick):
-        if svg in self.selected_layers:
-            set_tick(False)
-            self.selected_layers.remove(svg)
+    def _release_raster(self, key):
+        if any(other.key == key for other in self.layers):
+            self._update_raster_hidden(key)
         else:
-            set_tick(True)
-            self.selected_layers.add(svg)
+            raster_cache.drop(key)
+
+    def _update_raster_hidden(self, key):
+        raster_cache.set_hidden(key, all(not other.visible for other in self.layers if other.key == key))
 
-    def _swap_layers(self, idx1, idx2):
-        self.ordered_svgs[idx1], self.ordered_svgs[idx2] = self.ordered_svgs[idx2], self.ordered_svgs[idx1]
+    def toggle_layer_selection(self, svg):
+        self.layers.set_selected(svg, not self.layers.is_selected(svg))
 
-        self.update_canvas_starting(self.ordered_svgs[idx1], update_fst_png=False)
-        self.update_layers_list()
+    def on_layers_changed(self, event, svg, start, stop):
+        if event == 'insert':
+            self.draw_svg(svg)
+            self.draw_points(svg)
+        elif event == 'remove':
+            if svg in self.moving_layers:
+                self._end_move()
+            if svg in self.diff_layers:
+                self.toggle_difference()
+            if svg in self.deviation_layers:
+                self.toggle_deviations()
+            self.canvas.delete(f'{svg.id}')
+            self.compositor.remove_layer(svg.id)
+            self.points_scales.pop(svg.id, None)
+            self._clear_points(svg)
+            self._release_raster(svg.key)
+            self.workers.cancel(svg.id)
+            self._renumber_frames(start, stop)
+            self._schedule_composite()
+        elif event == 'update':
+            if svg in self.deviation_layers:
+                self.deviation_match = None
+            self.redraw_layer(svg)
+        elif event == 'swap':
+            for idx in range(stop - 1, start - 1, -1):
+                self._restack(self.layers[idx])
+            self._renumber_frames(start, stop)
+            self._schedule_composite()
 
     def move_layer_up(self, idx):
         if idx == 0:
             return
 
-        self._swap_layers(idx - 1, idx)
+        self.layers.swap(idx - 1, idx)
 
     def move_layer_down(self, idx):
-        if idx == len(self.ordered_svgs) - 1:
+        if idx == len(self.layers) - 1:
             return
 
-        self._swap_layers(idx, idx + 1)
+        self.layers.swap(idx, idx + 1)
 
     def set_svg_color(self, svg):
         svg.color = colorchooser.askcolor()[0]
-        self.update_canvas_starting(svg)
+        self.redraw_layer(svg)
 
-    def set_svg_opacity(self, svg, val, update_opacity_label):
+    def set_svg_opacity(self, svg, val):
         svg.opacity = val
-        update_opacity_label(val)
 
         if self.canvas_opacity_timer_ids.get(svg.id) is not None:
             self.root.after_cancel(self.canvas_opacity_timer_ids[svg.id])
 
         self.canvas_opacity_timer_ids[svg.id] = self.root.after(
             SVG_OPACITY_DELAY,
-            lambda: self.update_canvas_starting(svg)
+            lambda: self.draw_svg(svg)
         )
 
-    def close_svg(self, svg, idx):
-        self.svgs.pop(svg.filename)
-        self.ordered_svgs.pop(idx)
-        self.selected_layers.discard(svg)
-        self.canvas.delete(f'{svg.id}')
-        if svg.id in self.canvas.images:
-            self.canvas.images.pop(svg.id)
-
-        if idx < len(self.ordered_svgs):
-            self.update_canvas_starting(self.ordered_svgs[idx])
-        self.update_layers_list()
+    def close_svg(self, svg):
+        self.layers.remove(svg)
 
     def update_canvas(self):
-        for svg in self.ordered_svgs:
+        for svg in self.layers:
             self.draw_svg(svg)
             self.draw_points(svg)
 
-    def update_canvas_starting(self, fst_svg, update_fst_png=True):
-        self.draw_svg(fst_svg, update_png=update_fst_png)
-        self.draw_points(fst_svg)
+    def redraw_layer(self, svg):
+        self.draw_svg(svg)
+        self.draw_points(svg)
+        self._restack(svg)
 
-        found_causing = False
-        for svg in self.ordered_svgs:
-            if not found_causing:
-                if svg.id == fst_svg.id:
-                    found_causing = True
-                continue
-            self.draw_svg(svg, update_png=False)
-            self.draw_points(svg)
+    def update_composite(self):
+        self.composite_timer_id = None
+        self.compositor.resize(self.canvas.winfo_width(), self.canvas.winfo_height())
+        moving_ids = {svg.id for svg in self.moving_layers}
+        self.compositor.set_order([svg.id for svg in self.layers if svg.visible and svg.id not in moving_ids])
+
+        with perf.stage('composite', layers=len(self.compositor.order)):
+            image = _to_image(self.compositor.composite(), 'RGBA')
+
+        with perf.stage('photo_image', pixels=image.width * image.height):
+            if self.composite_image is not None and \
+                    (self.composite_image.width(), self.composite_image.height()) == image.size:
+                self.composite_image.paste(image)
+            else:
+                self.composite_image = _photo_image(image)
+                self.canvas.delete('composite')
+                self.canvas.create_image(0, 0, anchor=tk.NW, image=self.composite_image, tags=('composite',))
+                self.canvas.tag_lower('composite')
+                self.canvas.tag_lower('grid')
+
+        self.update_diff()
+        self.update_deviations()
+
+    def toggle_difference(self):
+        self.diff_layers = [] if len(self.diff_layers) > 0 else self._compared_layers('Difference')
+        self.diff_checkbutton_flag.set(len(self.diff_layers) > 0)
+        self.update_diff()
+
+    def toggle_deviations(self):
+        if len(self.deviation_layers) > 0:
+            self.layers_panel.set_comparison(self.deviation_layers[1], None)
+            self.deviation_layers = []
+        else:
+            self.deviation_layers = self._compared_layers('Point Deviations')
+
+        self.deviation_match = None
+        self.deviation_checkbutton_flag.set(len(self.deviation_layers) > 0)
+        self.update_deviations()
+
+    def _compared_layers(self, title):
+        selected = sorted(self.layers.selected(), key=self.layers.idx)
+        if len(selected) != 2:
+            messagebox.showinfo(title=title, message='Select exactly two layers to compare')
+            return []
+
+        return selected
+
+    def update_diff(self):
+        crops = []
+        for svg in self.diff_layers:
+            alpha = raster_cache.get(svg.key, self.scale) if svg.visible else None
+            if alpha is None:
+                self._clear_diff()
+                return
+
+            x0, y0 = max(0, -int(svg.lt_pos.x)), max(0, -int(svg.lt_pos.y))
+            x1 = min(alpha.shape[1], self.canvas.winfo_width() - int(svg.lt_pos.x))
+            y1 = min(alpha.shape[0], self.canvas.winfo_height() - int(svg.lt_pos.y))
+            if x1 > x0 and y1 > y0:
+                crops.append((alpha[y0:y1, x0:x1], int(svg.lt_pos.x) + x0, int(svg.lt_pos.y) + y0))
+            else:
+                crops.append(None)
+
+        if len(crops) == 0 or crops == [None, None]:
+            self._clear_diff()
+            return
+
+        empty = np.empty((0, 0), dtype=np.uint8)
+        if crops[0] is None:
+            crops[0] = (empty, *crops[1][1:])
+        if crops[1] is None:
+            crops[1] = (empty, *crops[0][1:])
+
+        (crop1, x1, y1), (crop2, x2, y2) = crops
+        diff, (x, y) = raster_diff(crop1, crop2, (x2 - x1, y2 - y1))
+        x, y = x1 + x, y1 + y
+        stats = diff_stats(diff, (x, y))
+
+        pixels = np.empty((*diff.shape, 4), dtype=np.uint8)
+        pixels[..., :3] = [c >> 8 for c in self.canvas.winfo_rgb(COLOR_DIFF)]
+        pixels[..., 3] = diff
+
+        self.canvas.delete('diff')
+        self.diff_image = _photo_image(_to_image(pixels, 'RGBA'))
+        self.canvas.create_image(x, y, anchor=tk.NW, image=self.diff_image, tags=('diff',))
+        for below in ('selection', 'composite', 'grid'):
+            if len(self.canvas.find_withtag(below)) > 0:
+                self.canvas.tag_raise('diff', below)
+                break
+
+        svg1, svg2 = self.diff_layers
+        text = f'#{self.layers.idx(svg1) + 1} vs #{self.layers.idx(svg2) + 1}: ' \
+               f'{stats["changed_pixels"]} changed pixels in view'
+        if stats['diff_bbox'] is not None:
+            bx0, by0, bx1, by1 = [(coord - origin) / self.scale for coord, origin
+                                  in zip(stats['diff_bbox'], (svg1.lt_pos.x, svg1.lt_pos.y) * 2)]
+            text += f', bounds ({bx0:.2f}, {by0:.2f}) – ({bx1:.2f}, {by1:.2f})'
+        self.diff_label.configure(text=text)
+        self.diff_label.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas)
+
+    def _clear_diff(self):
+        self.canvas.delete('diff')
+        self.diff_image = None
+        self.diff_label.pack_forget()
+
+    def update_deviations(self):
+        if len(self.deviation_layers) == 0 or not all(svg.visible for svg in self.deviation_layers):
+            self.canvas.delete('deviation')
+            self.deviation_image = None
+            return
+
+        svg1, svg2 = self.deviation_layers
+        offset = ((svg2.lt_pos.x - svg1.lt_pos.x) / self.scale, (svg2.lt_pos.y - svg1.lt_pos.y) / self.scale)
+        if self.deviation_match is None or self.deviation_match[0] != offset:
+            distances1, distances2 = match_points(svg1, svg2, offset, DEVIATION_MATCH_RADIUS)
+            self.deviation_match = (offset, distances1, distances2)
+
+            stats = deviation_stats(distances1, distances2)
+            text = f'vs #{self.layers.idx(svg1) + 1}: {stats["matched"]} matched, {stats["unmatched"]} unmatched, ' \
+                   f'{stats["reference_unmatched"]} unmatched in #{self.layers.idx(svg1) + 1}'
+            if stats['matched'] > 0:
+                text += f'\nDeviation: mean {stats["mean_deviation"]:.3f}, max {stats["max_deviation"]:.3f}'
+            self.layers_panel.set_comparison(svg2, text)
+
+        _, distances1, distances2 = self.deviation_match
+        points1, points2 = [np.vstack(self._screen_points(svg)) for svg in self.deviation_layers]
+        unmatched_rgba = (*(c >> 8 for c in self.canvas.winfo_rgb(COLOR_UNMATCHED)), 255)
+
+        pixels = np.zeros((self.canvas.winfo_height(), self.canvas.winfo_width(), 4), dtype=np.uint8)
+        matched = np.isfinite(distances2)
+        _stamp(pixels, points2[matched], _deviation_colors(distances2[matched]), DEVIATION_POINT_RADIUS)
+        _stamp(pixels, points2[~matched], unmatched_rgba, DEVIATION_POINT_RADIUS + 1)
+        _stamp(pixels, points1[~np.isfinite(distances1)], unmatched_rgba, DEVIATION_POINT_RADIUS + 1)
+
+        self.canvas.delete('deviation')
+        self.deviation_image = _photo_image(_to_image(pixels, 'RGBA'))
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.deviation_image, tags=('deviation',))
+
+    def _schedule_composite(self):
+        if self.composite_timer_id is None:
+            self.composite_timer_id = self.root.after_idle(self.update_composite)
 
     def update_canvas_with_delay(self):
-        for svg in self.ordered_svgs:
-            self.canvas.delete(f'{svg.id}.frame')
-            self._draw_frame(svg)
+        self._end_move()
+
+        if self.canvas_preview_timer_id is None:
+            self.canvas_preview_timer_id = self.root.after(SVG_PREVIEW_DELAY, self.preview_canvas)
 
         if self.canvas_scroll_timer_id is not None:
             self.root.after_cancel(self.canvas_scroll_timer_id)
@@ -341,68 +554,225 @@ class SVGComparator:
             self.update_canvas
         )
 
-    def update_layers_list(self):
-        for layer in self.layers_list.winfo_children():
-            layer.destroy()
-        for svg in self.ordered_svgs:
-            self.add_to_layers_list(svg)
+    def preview_canvas(self):
+        self.canvas_preview_timer_id = None
+        self.update_grid()
+
+        for svg in self.layers:
+            self.canvas.delete(f'{svg.id}.frame')
+            self._draw_frame(svg)
+
+            if svg.visible:
+                self._preview_svg(svg)
+                self._preview_points(svg)
+
+    def _preview_svg(self, svg):
+        from PIL import Image
+
+        alpha, cached_scale = raster_cache.nearest(svg.key, self.scale)
+        if alpha is None:
+            return
+
+        lt_pos = svg.lt_pos
+        x0, y0 = max(0, int(-lt_pos.x)), max(0, int(-lt_pos.y))
+        x1 = min(self.scale * svg.width, int(self.canvas.winfo_width() - lt_pos.x))
+        y1 = min(self.scale * svg.height, int(self.canvas.winfo_height() - lt_pos.y))
+        if x1 <= x0 or y1 <= y0:
+            self.compositor.set_layer(svg.id, np.empty((0, 0, 4), dtype=np.uint8), 0, 0)
+            self._schedule_composite()
+            return
+
+        factor = self.scale / cached_scale
+        preview = Image.fromarray(alpha).resize((x1 - x0, y1 - y0), Image.BILINEAR,
+                                                box=(x0 / factor, y0 / factor, x1 / factor, y1 / factor))
+
+        self.compositor.set_layer(svg.id, tint(np.asarray(preview), svg.color, svg.opacity),
+                                  lt_pos.x + x0, lt_pos.y + y0)
+        self._schedule_composite()
+
+    def _preview_points(self, svg):
+        points_scale = self.points_scales.get(svg.id)
+        if points_scale is None or points_scale == self.scale:
+            return
+
+        factor = self.scale / points_scale
+        for tag in (f'{svg.id}.point', f'{svg.id}.connector'):
+            self.canvas.scale(tag, svg.lt_pos.x, svg.lt_pos.y, factor, factor)
+        self.points_scales[svg.id] = self.scale
 
     def draw_svg(self, svg, update_png=True):
         if not svg.visible:
             return
 
-        self.canvas.delete(f'{svg.id}.image')
+        if svg in self.moving_layers:
+            self._end_move()
 
         if update_png:
-            if svg.id in self.canvas.images:
-                self.canvas.images.pop(svg.id)
+            alpha = raster_cache.get(svg.key, self.scale)
+            if alpha is None:
+                self._render_in_background(svg)
+            else:
+                self.workers.cancel(svg.id)
+                self.compositor.set_layer(svg.id, tint(alpha, svg.color, svg.opacity), svg.lt_pos.x, svg.lt_pos.y)
+
+        self._schedule_composite()
 
-            image = tk.PhotoImage(data=svg.get_png(self.scale))
-            self.canvas.images[svg.id] = image  # Keeping a reference to the image to prevent garbage collection
+    def _render_in_background(self, svg):
+        scale = self.scale
 
-        self.canvas.create_image(svg.lt_pos.x, svg.lt_pos.y, anchor=tk.NW, image=self.canvas.images[svg.id],
-                                 tags=(f'{svg.id}.image', svg.id, 'image'))
+        def on_rendered(alpha):
+            raster_cache.put(svg.key, scale, alpha)
+            if svg in self.layers and scale == self.scale:
+                self.draw_svg(svg)
+
+        def on_error(e):
+            self.status_label.configure(text=f'Could not render {svg.filename}: {e}')
+
+        self.workers.submit(svg.id, scale, on_rendered, load_alpha, *svg.render_args(scale), on_error=on_error)
+
+    def _restack(self, svg):
+        for above in self.layers[self.layers.idx(svg) + 1:]:
+            if len(self.canvas.find_withtag(above.id)) > 0:
+                self.canvas.tag_lower(svg.id, above.id)
+                break
+        else:
+            self.canvas.tag_raise(svg.id)
+
+        below = None
+        for kind in ('int', 'connector', 'lod', 'frame', 'end'):
+            tag = f'{svg.id}.{kind}'
+            if len(self.canvas.find_withtag(tag)) > 0:
+                if below is not None:
+                    self.canvas.tag_raise(tag, below)
+                below = tag
+
+    def _renumber_frames(self, start, stop):
+        for idx in range(start, stop):
+            svg = self.layers[idx]
+            self.canvas.itemconfigure(f'{svg.id}.frame_text', text=f'#{idx + 1}')
 
     def _draw_frame(self, svg):
         frame_tags = (f'{svg.id}.frame', svg.id, 'frame')
         lt_x, lt_y = svg.lt_pos.x, svg.lt_pos.y
         rb_x, rb_y = lt_x + self.scale * svg.width, lt_y + self.scale * svg.height
 
-        idx = self._svg_idx(svg.id)
-        text = self.canvas.create_text(lt_x, rb_y, anchor=tk.NW, text=f'#{idx + 1}', font=font.Font(size=18),
-                                       fill=rgb_to_hex(svg.color), tags=frame_tags)
+        idx = self.layers.idx(svg)
+        text = self.canvas.create_text(lt_x, rb_y, anchor=tk.NW, text=f'#{idx + 1}', font=self.frame_font,
+                                       fill=rgb_to_hex(svg.color), tags=(f'{svg.id}.frame_text', *frame_tags))
 
         self.canvas.create_rectangle(lt_x, lt_y, rb_x, rb_y,
                                      outline=rgb_to_hex(svg.color), tags=frame_tags)
 
-    def _draw_points(self, svg, points, color):
-        if len(points) > 0:
-            for point in points:
-                pos = svg.lt_pos + point * self.scale
-                self.canvas.create_oval(pos.x - 3, pos.y - 3, pos.x + 3, pos.y + 3,
-                                        fill=color, outline=COLOR_OUTLINE, tags=(f'{svg.id}.point', svg.id, 'point'))
+    def _draw_points(self, svg, points, color, kind):
+        return [self.canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=COLOR_OUTLINE,
+                                        tags=(f'{svg.id}.{kind}', f'{svg.id}.point', svg.id, 'point'))
+                for x, y in points.tolist()]
+
+    def _draw_connectors(self, svg, connectors):
+        return [self.canvas.create_line(x1, y1, x2, y2, fill=COLOR_CONNECTOR, width=1, arrow=tk.FIRST,
+                                        tags=(f'{svg.id}.connector', svg.id, 'connector'))
+                for x1, y1, x2, y2 in connectors.tolist()]
+
+    def _draw_points_lod(self, svg, end_points, int_points):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+
+        for points, color in ((int_points, COLOR_INT_POINT), (end_points, COLOR_END_POINT)):
+            _stamp(pixels, points, (*(c >> 8 for c in self.canvas.winfo_rgb(color)), 255), POINTS_LOD_RADIUS)
+
+        with perf.stage('photo_image', pixels=width * height):
+            image = _photo_image(_to_image(pixels, 'RGBA'))
+        self.lod_images[svg.id] = image
+        self.canvas.delete(f'{svg.id}.lod')
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=image, tags=(f'{svg.id}.lod', svg.id, 'point'))
+
+    def _screen_points(self, svg):
+        offset = np.array([svg.lt_pos.x, svg.lt_pos.y])
+        return offset + svg.end_points * self.scale, offset + svg.int_points * self.scale
+
+    def _in_viewport(self, points, margin=3):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        return ((points[:, 0] >= -margin) & (points[:, 0] <= width + margin)
+                & (points[:, 1] >= -margin) & (points[:, 1] <= height + margin))
+
+    def _sync_items(self, items, visible, create):
+        visible = set(visible.tolist())
+
+        gone = [idx for idx in items if idx not in visible]
+        if len(gone) > 0:
+            self.canvas.delete(*[items.pop(idx) for idx in gone])
+
+        new = [idx for idx in visible if idx not in items]
+        items.update(zip(new, create(new)))
+
+        return len(new)
+
+    def _clear_points(self, svg):
+        self.canvas.delete(f'{svg.id}.point', f'{svg.id}.connector', f'{svg.id}.lod')
+        self.drawn_points.pop(svg.id, None)
+        self.lod_images.pop(svg.id, None)
+
+    def sync_points(self, svg):
+        if not svg.visible or not self.points_visible:
+            return
+
+        if svg in self.moving_layers:
+            self._end_move()
+
+        with perf.stage('points.sync') as args:
+            args['items'] = self._sync_points(svg)
+
+    def _sync_points(self, svg):
+        drawn = self.drawn_points.setdefault(svg.id, {'int': {}, 'connector': {}, 'end': {}})
+        end_points, int_points = self._screen_points(svg)
+        end_visible, int_visible = self._in_viewport(end_points), self._in_viewport(int_points)
+
+        if np.count_nonzero(end_visible) + np.count_nonzero(int_visible) > POINTS_LOD_LIMIT:
+            self._clear_points(svg)
+            self._draw_points_lod(svg, end_points[end_visible], int_points[int_visible])
+            self._restack(svg)
+            return 0
+
+        if svg.id in self.lod_images:
+            self.canvas.delete(f'{svg.id}.lod')
+            self.lod_images.pop(svg.id)
+
+        connectors = svg.connectors
+        connector_visible = int_visible[connectors[:, 0]] | end_visible[connectors[:, 1]]
+
+        added = self._sync_items(
+            drawn['int'], np.flatnonzero(int_visible),
+            lambda idxs: self._draw_points(svg, int_points[idxs], COLOR_INT_POINT, 'int'),
+        )
+        added += self._sync_items(
+            drawn['connector'], np.flatnonzero(connector_visible),
+            lambda idxs: self._draw_connectors(svg, np.hstack((int_points[connectors[idxs, 0]],
+                                                               end_points[connectors[idxs, 1]]))),
+        )
+        added += self._sync_items(
+            drawn['end'], np.flatnonzero(end_visible),
+            lambda idxs: self._draw_points(svg, end_points[idxs], COLOR_END_POINT, 'end'),
+        )
+
+        if added > 0:
+            self._restack(svg)
+
+        return added
 
     def draw_points(self, svg):
         if not svg.visible:
             return
 
-        self.canvas.delete(f'{svg.id}.frame', f'{svg.id}.point', f'{svg.id}.connector')
+        if svg in self.moving_layers:
+            self._end_move()
 
-        if self.points_visible:
-            self._draw_points(svg, svg.int_points, COLOR_INT_POINT)
-
-            lt_pos = svg.lt_pos
-            for int_point in svg.int_points:
-                for end_point in int_point.whose:
-                    self.canvas.create_line(lt_pos.x + self.scale * int_point.x,
-                                            lt_pos.y + self.scale * int_point.y,
-                                            lt_pos.x + self.scale * end_point.x,
-                                            lt_pos.y + self.scale * end_point.y,
-                                            fill=COLOR_CONNECTOR, width=1, arrow=tk.FIRST,
-                                            tags=(f'{svg.id}.connector', svg.id, 'connector'))
+        self.canvas.delete(f'{svg.id}.frame')
+        self._clear_points(svg)
+        self.points_scales[svg.id] = self.scale
 
+        if self.points_visible:
             self._draw_frame(svg)
-            self._draw_points(svg, svg.end_points, COLOR_END_POINT)
+            self.sync_points(svg)
 
     def scale_up(self):
         self.scale += 1
@@ -414,11 +784,78 @@ class SVGComparator:
             self.update_canvas_with_delay()
 
     def move_canvas(self, direction, speed=1):
-        delta = speed * direction
+        self._queue_move(speed * direction)
+
+        if self.move_end_timer_id is not None:
+            self.root.after_cancel(self.move_end_timer_id)
+        self.move_end_timer_id = self.root.after(MOVE_END_DELAY, self._end_move)
+
+    def _begin_move(self):
+        self.moving_layers = self.layers.selected()
+        self.move_offset = Point(0, 0)
+
+        for svg in self.moving_layers:
+            for tag in (f'{svg.id}.point', f'{svg.id}.connector', f'{svg.id}.lod'):
+                self.canvas.itemconfigure(tag, state=tk.HIDDEN)
+
+        selection = Compositor()
+        selection.resize(self.canvas.winfo_width(), self.canvas.winfo_height())
+        for svg in self.moving_layers:
+            layer = self.compositor.layers.get(svg.id)
+            if svg.visible and layer is not None:
+                selection.set_layer(svg.id, layer['pixels'], layer['x'], layer['y'])
+        selection.set_order([svg.id for svg in self.layers if svg.id in selection.layers])
+
+        self.selection_image = _photo_image(_to_image(selection.composite(), 'RGBA'))
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.selection_image, tags=('selection',))
+        self.canvas.tag_raise('selection', 'composite' if len(self.canvas.find_withtag('composite')) > 0 else 'grid')
+        self._schedule_composite()
+
+    def _queue_move(self, delta):
+        if self.selection_image is None:
+            self._begin_move()
+
+        self.move_delta += delta
+        if self.move_timer_id is None:
+            self.move_timer_id = self.root.after(MOVE_FRAME_DELAY, self._flush_move)
+
+    def _flush_move(self):
+        self.move_timer_id = None
+        delta = self.move_delta
+        if delta.x == 0 and delta.y == 0:
+            return
 
-        for svg in self.selected_layers:
+        self.move_delta = Point(0, 0)
+        self.move_offset += delta
+        self.canvas.move('selection', delta.x, delta.y)
+        for svg in self.moving_layers:
             svg.lt_pos += delta
-            self.canvas.move(svg.id, delta.x, delta.y)
+            self.canvas.move(f'{svg.id}.frame', delta.x, delta.y)
+
+        if any(svg in self.diff_layers for svg in self.moving_layers):
+            self.update_diff()
+
+    def _end_move(self):
+        for timer_id in (self.move_timer_id, self.move_end_timer_id):
+            if timer_id is not None:
+                self.root.after_cancel(timer_id)
+        self.move_end_timer_id = None
+        self._flush_move()
+
+        offset = self.move_offset
+        moving_layers, self.moving_layers = self.moving_layers, []
+        for svg in moving_layers:
+            for tag in (f'{svg.id}.point', f'{svg.id}.connector', f'{svg.id}.lod'):
+                self.canvas.move(tag, offset.x, offset.y)
+                self.canvas.itemconfigure(tag, state=tk.NORMAL)
+            self.compositor.move_layer(svg.id, offset.x, offset.y)
+            self.sync_points(svg)
+
+        if self.selection_image is not None:
+            self.canvas.delete('selection')
+            self.selection_image = None
+            self._schedule_composite()
+        self.move_offset = Point(0, 0)
 
     def on_canvas_scroll(self, event):
         if event.delta > 0:
@@ -429,7 +866,7 @@ class SVGComparator:
     def toggle_point_visibility(self):
         self.points_visible = not self.points_visible
         self.points_checkbutton_flag.set(self.points_visible)
-        for svg in self.ordered_svgs:
+        for svg in self.layers:
             self.draw_points(svg)
 
     def on_canvas_click(self, event):
@@ -437,42 +874,169 @@ class SVGComparator:
 
     def on_canvas_drag(self, event):
         dest = Point(event.x, event.y)
-        self.move_canvas(dest - self.drag_data)
+        self._queue_move(dest - self.drag_data)
         self.drag_data = dest
 
     def move_layers_to_origin(self):
+        self._end_move()
         self.drag_data = Point(0, 0)
-        for svg in self.selected_layers:
-            self.canvas.moveto(svg.id, 0, 0)
-            svg.lt_pos = Point(0, 0)
+        for svg in self.layers.selected():
+            self._move_layer(svg, Point(0, 0) - svg.lt_pos)
+        self._schedule_composite()
+
+    def auto_align_layers(self, by_points):
+        self._end_move()
+        selected = sorted(self.layers.selected(), key=self.layers.idx)
+        if len(selected) < 2:
+            messagebox.showinfo(title='Auto-align', message='Select a reference layer and the layers to align')
+            return
+
+        reference, *others = selected
+
+        if by_points:
+            for svg in others:
+                dx, dy = points_offset(reference.index, svg.end_points)
+                self._move_layer(svg, reference.lt_pos + Point(round(dx * self.scale), round(dy * self.scale))
+                                 - svg.lt_pos)
+        else:
+            reference_alpha, reference_scale = raster_cache.nearest(reference.key, self.scale)
+            for svg in others:
+                alpha = raster_cache.get(svg.key, reference_scale) if reference_alpha is not None else None
+                if alpha is None:
+                    messagebox.showinfo(title='Auto-align', message='The layers are still being rendered')
+                    break
+
+                factor = self.scale / reference_scale
+                dx, dy = raster_offset(reference_alpha, alpha)
+                self._move_layer(svg, reference.lt_pos + Point(round(dx * factor), round(dy * factor))
+                                 - svg.lt_pos)
+
+        self._schedule_composite()
+
+    def _move_layer(self, svg, delta):
+        svg.lt_pos += delta
+        self.canvas.move(svg.id, delta.x, delta.y)
+        self.compositor.move_layer(svg.id, delta.x, delta.y)
+        self.sync_points(svg)
+
+    def on_canvas_hover(self, event):
+        nearest = None
+        under_cursor = None
+
+        for idx, svg in enumerate(self.layers):
+            if not svg.visible:
+                continue
+
+            x, y = (event.x - svg.lt_pos.x) / self.scale, (event.y - svg.lt_pos.y) / self.scale
+            if 0 <= x <= svg.width and 0 <= y <= svg.height:
+                under_cursor = (idx, x, y)
+
+            found = svg.index.nearest(x, y, HOVER_RADIUS / self.scale)
+            if found is not None and (nearest is None or found[0] <= nearest[0]):
+                nearest = (found[0], idx, svg, *found[1:])
+
+        if nearest is not None:
+            _, idx, svg, kind, point_idx = nearest
+            x, y = (svg.end_points if kind == 'end' else svg.int_points)[point_idx]
+            name = 'End point' if kind == 'end' else 'Internal point'
+            self.status_label.configure(text=f'#{idx + 1} {name}: ({x:g}, {y:g})')
+        elif under_cursor is not None:
+            idx, x, y = under_cursor
+            self.status_label.configure(text=f'#{idx + 1} ({x:.2f}, {y:.2f})')
+        else:
+            self.status_label.configure(text='')
+
+    def toggle_perf_overlay(self):
+        perf.enabled = self.perf_checkbutton_flag.get()
+        if perf.enabled:
+            self.update_perf_overlay()
+        else:
+            self.root.after_cancel(self.perf_timer_id)
+            self.perf_timer_id = None
+            self.canvas.delete('perf')
+
+    def update_perf_overlay(self):
+        self.canvas.delete('perf')
+        text = self.canvas.create_text(self.canvas.winfo_width() - 10, 10, anchor=tk.NE, text=perf.format_summary(),
+                                       font='TkFixedFont', tags=('perf',))
+        x0, y0, x1, y1 = self.canvas.bbox(text)
+        self.canvas.create_rectangle(x0 - 5, y0 - 5, x1 + 5, y1 + 5, fill='white', outline='gray', tags=('perf',))
+        self.canvas.tag_raise('perf')
+        self.canvas.tag_raise(text)
+        self.perf_timer_id = self.root.after(PERF_OVERLAY_DELAY, self.update_perf_overlay)
+
+    def export_perf(self, chrome):
+        filename = filedialog.asksaveasfilename(defaultextension='.json', filetypes=[('JSON', '*.json')])
+        if not filename:
+            return
+
+        with open(filename, 'w') as file:
+            if chrome:
+                perf.write_chrome_trace(file)
+            else:
+                perf.write_json(file)
+
+    def update_grid(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        step = self.scale * math.ceil(GRID_MIN_STEP / self.scale)
+        if self.grid_key == (width, height, step):
+            return
+
+        self.grid_key = (width, height, step)
+        self.grid_image = _photo_image(_grid_image(width, height, step, self.canvas.winfo_rgb(COLOR_GRID)))
+        self.canvas.delete('grid')
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.grid_image, tags=('grid',))
+        self.canvas.tag_lower('grid')
+
+    def on_canvas_resize(self):
+        self.update_grid()
+        self._schedule_composite()
+        for svg in self.layers:
+            self.sync_points(svg)
+
+
+def _to_image(pixels, mode):
+    from PIL import Image
+
+    return Image.fromarray(pixels, mode)
+
+
+def _photo_image(image):
+    from PIL import ImageTk
 
-    def on_layers_canvas_vscroll(self, event):
-        self.layers_canvas.yview_scroll(-event.delta, 'units')
+    return ImageTk.PhotoImage(image)
 
-    def on_layers_canvas_hscroll(self, event):
-        self.layers_canvas.xview_scroll(-event.delta, 'units')
 
-    def _svg_idx(self, svg_id):
-        return [*map(lambda s: s.id, self.ordered_svgs)].index(svg_id)
+def _grid_image(width, height, step, rgb):
+    pixels = np.full((max(1, height), max(1, width), 3), 255, dtype=np.uint8)
+    color = [c >> 8 for c in rgb]
+    pixels[::step] = color
+    pixels[:, ::step] = color
 
+    return _to_image(pixels, 'RGB')
 
-def _create_grid(canvas):
-    width = canvas.winfo_screenwidth()
-    height = canvas.winfo_screenheight()
 
-    for x in range(0, width, 10):
-        canvas.create_line(x, 0, x, height, fill=COLOR_GRID)
+def _stamp(pixels, points, rgba, radius):
+    height, width = pixels.shape[:2]
+    rgba = np.asarray(rgba, dtype=np.uint8)
+    xy = np.rint(points).astype(np.int64)
 
-    for y in range(0, height, 10):
-        canvas.create_line(0, y, width, y, fill=COLOR_GRID)
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            x, y = xy[:, 0] + dx, xy[:, 1] + dy
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            pixels[y[inside], x[inside]] = rgba if rgba.ndim == 1 else rgba[inside]
 
 
-def add_tag(widget, tag):
-    widget.bindtags((tag,) + widget.bindtags())
+def _deviation_colors(distances):
+    ratio = distances / max(distances.max(initial=0), 1e-9)
 
+    colors = np.zeros((len(distances), 4), dtype=np.uint8)
+    colors[:, 0] = np.minimum(1, 2 * ratio) * 255
+    colors[:, 1] = np.minimum(1, 2 * (1 - ratio)) * 255
+    colors[:, 3] = 255
 
-def _add_layers_canvas_tag(widget):
-    add_tag(widget, 'LayersCanvas')
+    return colors
 
 
 def rgb_to_hex(rgb):
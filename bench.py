@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from timeit import timeit
+
+import numpy as np
+from PIL import Image, ImageTk
+
+import app
+import disk_cache
+import svg as svg_module
+from point import Point
+from raster_cache import raster_cache
+from svg import Svg, render_alpha, tint
+from svg_generator import generate_svg, parse_mix
+from svg_parser import PathCache
+
+
+def legacy_tint(png, color, opacity):
+    png = png.copy()
+    new_png_data = []
+    for pixel in png.getdata():
+        if pixel[3] > 0:
+            new_png_data.append((*color, int(pixel[3] * opacity)))
+        else:
+            new_png_data.append(pixel)
+    png.putdata(new_png_data)
+
+    return png
+
+
+def random_png(width, height):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    pixels[rng.random((height, width)) < .5] = 0
+
+    return Image.fromarray(pixels, 'RGBA')
+
+
+def legacy_redraw(png_bytes, color, opacity):
+    res_png_bytes = BytesIO()
+    with Image.open(BytesIO(png_bytes)) as png:
+        legacy_tint(png, color, opacity).save(res_png_bytes, format='PNG')
+
+    return res_png_bytes.getvalue()
+
+
+def same_pixels(legacy, tinted):
+    legacy, tinted = np.array(legacy), np.array(tinted)
+    visible = legacy[..., 3] > 0
+
+    return (legacy[..., 3] == tinted[..., 3]).all() and (legacy[visible] == tinted[visible]).all()
+
+
+def bench_tint(side, repeat=3):
+    png = random_png(side, side)
+    alpha = np.array(png.getchannel('A'))
+    color, opacity = (255, 0, 128), .37
+
+    if not same_pixels(legacy_tint(png, color, opacity), tint(alpha, color, opacity)):
+        raise AssertionError(f'tint output differs from the legacy loop at {side}x{side}')
+
+    png_bytes = BytesIO()
+    png.save(png_bytes, format='PNG')
+    png_bytes = png_bytes.getvalue()
+
+    legacy = timeit(lambda: legacy_redraw(png_bytes, color, opacity), number=repeat) / repeat
+    vectorized = timeit(lambda: tint(alpha, color, opacity), number=repeat) / repeat
+    print(f'tint {side}x{side}: PNG round trip with loop {legacy * 1000:.1f} ms, '
+          f'resident alpha {vectorized * 1000:.1f} ms, x{legacy / vectorized:.0f}')
+
+
+class HeadlessCanvas:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.items = {}
+        self.tags = {}
+        self.next_id = 1
+
+    def _create(self, *coords, tags=(), **options):
+        item_id = self.next_id
+        self.next_id += 1
+        tags = (tags,) if isinstance(tags, str) else tags
+        self.items[item_id] = [list(coords), tags]
+        for tag in tags:
+            self.tags.setdefault(tag, {})[item_id] = None
+        return item_id
+
+    create_image = create_line = create_oval = create_rectangle = create_text = _create
+
+    def find_withtag(self, tag):
+        if tag in self.items:
+            return (tag,)
+
+        return tuple(self.tags.get(tag, ()))
+
+    def delete(self, *tags):
+        for tag in tags:
+            for item_id in self.find_withtag(tag):
+                for item_tag in self.items.pop(item_id)[1]:
+                    self.tags[item_tag].pop(item_id, None)
+
+    def move(self, tag, dx, dy):
+        for item_id in self.find_withtag(tag):
+            coords = self.items[item_id][0]
+            coords[:] = [c + (dx if i % 2 == 0 else dy) for i, c in enumerate(coords)]
+
+    def tag_raise(self, *args, **options):
+        pass
+
+    tag_lower = itemconfigure = scale = tag_raise
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def winfo_rgb(self, color):
+        return 65535, 0, 0
+
+
+class HeadlessRoot:
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 1
+
+    def after(self, delay, callback):
+        timer_id = self.next_id
+        self.next_id += 1
+        self.pending[timer_id] = callback
+        return timer_id
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def after_cancel(self, timer_id):
+        self.pending.pop(timer_id, None)
+
+    def run_pending(self):
+        while len(self.pending) > 0:
+            self.pending.pop(next(iter(self.pending)))()
+
+
+class HeadlessWidget:
+    def __init__(self, *args, **kwargs):
+        self.value = None
+
+    def configure(self, **kwargs):
+        pass
+
+    def set(self, value):
+        self.value = value
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class HeadlessPhoto:
+    def __init__(self, image):
+        self.size = image.size
+        image.tobytes()
+
+    def width(self):
+        return self.size[0]
+
+    def height(self):
+        return self.size[1]
+
+    def paste(self, image):
+        image.tobytes()
+
+
+class HeadlessComparator(app.SVGComparator):
+    def __init__(self, width, height):
+        self.root = HeadlessRoot()
+        self.init_state()
+        self.workers.cancel = lambda owner: None
+        self.canvas = HeadlessCanvas(width, height)
+        self.frame_font = None
+        for name in ('status_label', 'diff_label', 'layers_panel', 'points_checkbutton_flag',
+                     'diff_checkbutton_flag', 'deviation_checkbutton_flag'):
+            setattr(self, name, HeadlessWidget())
+
+
+def measure(fn, repeat):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    return {'time': min(times), 'peak_memory': peak}
+
+
+def run_suite(args):
+    ImageTk.PhotoImage = HeadlessPhoto
+    with tempfile.TemporaryDirectory(prefix='svg-comparator-bench-') as directory:
+        return _run_suite(args, directory)
+
+
+def _run_suite(args, directory):
+    results = {}
+    cache_directory = os.path.join(directory, 'cache')
+
+    def record(name, fn):
+        results[name] = measure(fn, args.repeat)
+        print(f'{name}: {results[name]["time"] * 1000:.1f} ms, '
+              f'peak {results[name]["peak_memory"] / 2 ** 20:.1f} MiB', file=sys.stderr)
+
+    def fresh_cache():
+        disk_cache.disk_cache.directory = os.path.join(cache_directory, str(time.perf_counter_ns()))
+        disk_cache.disk_cache.size = None
+        svg_module._path_caches.clear()
+
+    filenames = []
+    for seed in range(max(args.layers)):
+        filename = os.path.join(directory, f'layer{seed}.svg')
+        with open(filename, 'w') as file:
+            file.write(generate_svg(args.paths, args.segments, args.mix, tuple(args.size), seed))
+        filenames.append(filename)
+
+    config = f'paths={args.paths},segments={args.segments}'
+    record(f'load/{config}', lambda: (fresh_cache(), Svg(filenames[0])))
+    record(f'load_cached/{config}', lambda: Svg(filenames[0]))
+
+    record(f'reload/{config}', lambda: (fresh_cache(), Svg(filenames[0], PathCache())))
+
+    fresh_cache()
+    path_cache = PathCache()
+    Svg(filenames[0], path_cache)
+    path_cache.done()
+    record(f'reload_memo/{config}', lambda: (fresh_cache(), Svg(filenames[0], PathCache(path_cache))))
+
+    svgs = [Svg(filename) for filename in filenames]
+    for scale in args.scales:
+        data, width, height = svgs[0].data, scale * svgs[0].width, scale * svgs[0].height
+        record(f'render/{config},scale={scale}', lambda: render_alpha(data, width, height))
+
+        alpha = render_alpha(data, width, height)
+        record(f'tint/{config},scale={scale}', lambda: tint(alpha, (255, 0, 0), .5))
+
+        for svg in svgs:
+            raster_cache.put(svg.key, scale, render_alpha(svg.data, scale * svg.width, scale * svg.height))
+
+        for layer_count in args.layers:
+            name = f'{config},scale={scale},layers={layer_count}'
+            comparator = HeadlessComparator(*args.viewport)
+            comparator.scale = scale
+            for svg in svgs[:layer_count]:
+                svg.lt_pos = Point(0, 0)
+                comparator.layers.append(svg)
+            comparator.root.run_pending()
+
+            def draw():
+                comparator.update_canvas()
+                comparator.root.run_pending()
+
+            def draw_points():
+                for svg in comparator.layers:
+                    comparator.draw_points(svg)
+
+            def nudge():
+                for _ in range(10):
+                    comparator.move_canvas(app.DIR_RIGHT)
+                comparator.root.run_pending()
+
+            record(f'draw_svg/{name}', draw)
+            record(f'draw_points/{name}', draw_points)
+            record(f'nudge/{name}', nudge)
+
+    return {
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                    'processor': platform.processor(), 'cpus': os.cpu_count()},
+        'results': results,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance):
+    regressions = []
+    for name, result in report['results'].items():
+        expected = baseline['results'].get(name)
+        if expected is not None and result['time'] > expected['time'] * (1 + tolerance):
+            regressions.append(f'{name}: {result["time"] * 1000:.1f} ms, baseline {expected["time"] * 1000:.1f} ms')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SVG Comparator hot paths.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    tint_parser = subparsers.add_parser('tint', help='compare tint with the legacy per-pixel loop')
+    tint_parser.add_argument('sides', type=int, nargs='*', default=[100, 1000, 2000])
+
+    suite_parser = subparsers.add_parser('suite', help='time load, render, tint and draw on synthetic SVGs')
+    suite_parser.add_argument('--paths', type=int, default=200)
+    suite_parser.add_argument('--segments', type=int, default=20, help='segments per path')
+    suite_parser.add_argument('--mix', type=parse_mix, help='segment weights, e.g. line=2,cubic=1')
+    suite_parser.add_argument('--size', type=int, nargs=2, default=(1000, 1000), metavar=('WIDTH', 'HEIGHT'))
+    suite_parser.add_argument('--scales', type=float, nargs='+', default=[1, 2])
+    suite_parser.add_argument('--layers', type=int, nargs='+', default=[1, 4])
+    suite_parser.add_argument('--viewport', type=int, nargs=2, default=(1280, 800), metavar=('WIDTH', 'HEIGHT'))
+    suite_parser.add_argument('--repeat', type=int, default=3)
+    suite_parser.add_argument('--output', '-o', help='write the report as JSON')
+    suite_parser.add_argument('--baseline', help='JSON report to compare against')
+    suite_parser.add_argument('--tolerance', type=float, default=.2, help='allowed slowdown over the baseline')
+    args = parser.parse_args()
+
+    if args.command == 'tint':
+        for side in args.sides:
+            bench_tint(side)
+        return 0
+
+    report = run_suite(args)
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compare_with_baseline(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        return 1 if len(regressions) > 0 else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,6 @@
+def add_tag(widget, tag):
+    widget.bindtags((tag,) + widget.bindtags())
+
+
+def add_layers_canvas_tag(widget):
+    add_tag(widget, 'LayersCanvas')
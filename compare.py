@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from svg import Svg, load_alpha
+
+
+def compare_svgs(filename1, filename2, scale=1):
+    svg1, svg2 = Svg(filename1), Svg(filename2)
+    metrics = {'first': filename1, 'second': filename2}
+
+    for cmd in svg1.cmd_quans:
+        metrics[f'{cmd}_delta'] = svg2.cmd_quans[cmd] - svg1.cmd_quans[cmd]
+    metrics['end_points_delta'] = len(svg2.end_points) - len(svg1.end_points)
+    metrics['int_points_delta'] = len(svg2.int_points) - len(svg1.int_points)
+    metrics.update(point_distances(svg1, svg2))
+
+    alpha1 = load_alpha(*svg1.render_args(scale))
+    alpha2 = load_alpha(*svg2.render_args(scale))
+    metrics.update(diff_stats(*raster_diff(alpha1, alpha2)))
+
+    return metrics
+
+
+def point_distances(svg1, svg2, offset=(0, 0)):
+    distances1, distances2 = match_points(svg1, svg2, offset)
+    if len(distances1) == 0 or len(distances2) == 0:
+        return {'mean_distance': None, 'hausdorff_distance': None}
+
+    distances = np.concatenate((distances1, distances2))
+
+    return {'mean_distance': float(distances.mean()), 'hausdorff_distance': float(distances.max())}
+
+
+def match_points(svg1, svg2, offset=(0, 0), max_distance=np.inf):
+    points1 = np.vstack((svg1.end_points, svg1.int_points))
+    points2 = np.vstack((svg2.end_points, svg2.int_points)) + offset
+    if len(points1) == 0 or len(points2) == 0:
+        return np.full(len(points1), np.inf), np.full(len(points2), np.inf)
+
+    distances1, _ = svg2.index.nearest_many(points1 - offset, max_distance)
+    distances2, _ = svg1.index.nearest_many(points2, max_distance)
+
+    return distances1, distances2
+
+
+def deviation_stats(distances1, distances2):
+    matched = distances2[np.isfinite(distances2)]
+
+    return {
+        'matched': len(matched),
+        'unmatched': len(distances2) - len(matched),
+        'reference_unmatched': int(np.count_nonzero(~np.isfinite(distances1))),
+        'mean_deviation': float(matched.mean()) if len(matched) > 0 else None,
+        'max_deviation': float(matched.max()) if len(matched) > 0 else None,
+    }
+
+
+def raster_diff(alpha1, alpha2, offset=(0, 0)):
+    dx, dy = int(offset[0]), int(offset[1])
+    x0, y0 = min(0, dx), min(0, dy)
+    x1, y1 = max(alpha1.shape[1], dx + alpha2.shape[1]), max(alpha1.shape[0], dy + alpha2.shape[0])
+
+    diff = np.zeros((y1 - y0, x1 - x0), dtype=np.int16)
+    diff[-y0:alpha1.shape[0] - y0, -x0:alpha1.shape[1] - x0] = alpha1
+    diff[dy - y0:dy - y0 + alpha2.shape[0], dx - x0:dx - x0 + alpha2.shape[1]] -= alpha2
+
+    return np.abs(diff).astype(np.uint8), (x0, y0)
+
+
+def diff_stats(diff, origin=(0, 0)):
+    changed = diff > 0
+    changed_pixels = int(np.count_nonzero(changed))
+
+    bbox = None
+    if changed_pixels > 0:
+        ys, xs = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+        bbox = (int(xs[0]) + origin[0], int(ys[0]) + origin[1],
+                int(xs[-1]) + 1 + origin[0], int(ys[-1]) + 1 + origin[1])
+
+    return {
+        'changed_pixels': changed_pixels,
+        'changed_ratio': changed_pixels / diff.size if diff.size > 0 else 0,
+        'diff_score': float(diff.mean()) / 255 if diff.size > 0 else 0,
+        'diff_bbox': bbox,
+    }
+
+
+def find_pairs(path1, path2):
+    if not os.path.isdir(path1) and not os.path.isdir(path2):
+        return [(path1, path2)], []
+
+    if not os.path.isdir(path1) or not os.path.isdir(path2):
+        raise ValueError('Both paths must be files or both must be directories')
+
+    names1, names2 = _svg_names(path1), _svg_names(path2)
+    pairs = [(os.path.join(path1, name), os.path.join(path2, name)) for name in sorted(names1 & names2)]
+    unmatched = [os.path.join(path1, name) for name in sorted(names1 - names2)] \
+        + [os.path.join(path2, name) for name in sorted(names2 - names1)]
+
+    return pairs, unmatched
+
+
+def compare_pairs(pairs, scale=1, jobs=None):
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return [*executor.map(_compare_pair, pairs, [scale] * len(pairs), chunksize=16)]
+
+
+def write_results(results, file, output_format):
+    if output_format == 'json':
+        json.dump(results, file, indent=2)
+        file.write('\n')
+        return
+
+    fieldnames = []
+    for result in results:
+        fieldnames.extend(key for key in result if key not in fieldnames)
+
+    writer = csv.DictWriter(file, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+def _compare_pair(pair, scale):
+    try:
+        return compare_svgs(*pair, scale=scale)
+    except Exception as e:
+        return {'first': pair[0], 'second': pair[1], 'error': str(e)}
+
+
+def _svg_names(directory):
+    names = set()
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.lower().endswith('.svg'):
+                names.add(os.path.relpath(os.path.join(dirpath, filename), directory))
+
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SVG files or directories of SVG files.')
+    parser.add_argument('first', help='SVG file or directory')
+    parser.add_argument('second', help='SVG file or directory with the same relative paths')
+    parser.add_argument('--scale', type=float, default=1, help='raster scale for the pixel difference')
+    parser.add_argument('--format', choices=('json', 'csv'), default='json', dest='output_format')
+    parser.add_argument('--output', '-o', help='output file, standard output by default')
+    parser.add_argument('--jobs', '-j', type=int, help='worker processes, all CPUs by default')
+    args = parser.parse_args()
+
+    try:
+        pairs, unmatched = find_pairs(args.first, args.second)
+    except ValueError as e:
+        parser.error(str(e))
+
+    for filename in unmatched:
+        print(f'No pair for {filename}', file=sys.stderr)
+
+    results = compare_pairs(pairs, args.scale, args.jobs)
+
+    if args.output is None:
+        write_results(results, sys.stdout, args.output_format)
+    else:
+        with open(args.output, 'w', newline='') as file:
+            write_results(results, file, args.output_format)
+
+    return 1 if any('error' in result for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
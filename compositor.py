@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class Compositor:
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.layers = {}
+        self.order = []
+        self.focus = None
+        self.below = None
+        self.above = None
+        self.result = None
+        self.dirty = set()
+        self.dirty_rect = None
+
+    def resize(self, width, height):
+        if (width, height) != (self.width, self.height):
+            self.width, self.height = width, height
+            self.below = self.above = None
+
+    def set_order(self, ids):
+        ids = [layer_id for layer_id in ids if layer_id in self.layers]
+        if ids != self.order:
+            self.order = ids
+            self.below = self.above = None
+
+    def set_layer(self, layer_id, pixels, x, y):
+        self._touch(layer_id)
+        self.layers[layer_id] = {'pixels': pixels, 'x': int(x), 'y': int(y)}
+        self._touch(layer_id)
+
+    def move_layer(self, layer_id, dx, dy):
+        layer = self.layers.get(layer_id)
+        if layer is not None:
+            self._touch(layer_id)
+            layer['x'] += int(dx)
+            layer['y'] += int(dy)
+            self._touch(layer_id)
+
+    def remove_layer(self, layer_id):
+        if self.layers.pop(layer_id, None) is not None:
+            self.set_order(self.order)
+
+    def composite(self):
+        if self.below is None or not self.dirty <= {self.focus}:
+            self._split()
+            rect = (0, 0, self.width, self.height)
+        else:
+            rect = self.dirty_rect or (0, 0, 0, 0)
+
+        self.dirty.clear()
+        self.dirty_rect = None
+
+        x0, y0, x1, y1 = rect
+        if x1 > x0 and y1 > y0:
+            res = self.below[y0:y1, x0:x1].copy()
+            if self.focus in self.order:
+                _over(res, self.layers[self.focus], x0, y0)
+
+            above = self.above[y0:y1, x0:x1]
+            res *= 1 - above[..., 3:]
+            res += above
+
+            self.result[y0:y1, x0:x1] = _unpremultiply(res)
+
+        return self.result
+
+    def _touch(self, layer_id):
+        self.dirty.add(layer_id)
+
+        layer = self.layers.get(layer_id)
+        if layer is not None:
+            self.dirty_rect = _union(self.dirty_rect, self._layer_rect(layer))
+
+    def _layer_rect(self, layer):
+        height, width = layer['pixels'].shape[:2]
+        return (max(0, layer['x']), max(0, layer['y']),
+                min(self.width, layer['x'] + width), min(self.height, layer['y'] + height))
+
+    def _split(self):
+        changed_in_order = [layer_id for layer_id in self.order if layer_id in self.dirty]
+        self.focus = changed_in_order[-1] if len(changed_in_order) > 0 else None
+
+        self.below = np.zeros((self.height, self.width, 4), dtype=np.float32)
+        self.above = np.zeros((self.height, self.width, 4), dtype=np.float32)
+        self.result = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+
+        focus_idx = self.order.index(self.focus) if self.focus is not None else len(self.order)
+        for layer_id in self.order[:focus_idx]:
+            _over(self.below, self.layers[layer_id])
+        for layer_id in self.order[focus_idx + 1:]:
+            _over(self.above, self.layers[layer_id])
+
+
+def _union(rect1, rect2):
+    if rect1 is None:
+        return rect2
+
+    return min(rect1[0], rect2[0]), min(rect1[1], rect2[1]), max(rect1[2], rect2[2]), max(rect1[3], rect2[3])
+
+
+def _over(dst, layer, dst_x=0, dst_y=0):
+    pixels = layer['pixels']
+    x, y = layer['x'] - dst_x, layer['y'] - dst_y
+    height, width = dst.shape[:2]
+
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + pixels.shape[1]), min(height, y + pixels.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    src = pixels[y0 - y:y1 - y, x0 - x:x1 - x].astype(np.float32)
+    src *= 1 / 255
+    src[..., :3] *= src[..., 3:]
+
+    region = dst[y0:y1, x0:x1]
+    region *= 1 - src[..., 3:]
+    region += src
+
+
+def _unpremultiply(pixels):
+    alpha = pixels[..., 3:]
+    rgb = np.divide(pixels[..., :3], alpha, out=np.zeros_like(pixels[..., :3]), where=alpha > 0)
+
+    res = np.empty(pixels.shape, dtype=np.uint8)
+    res[..., :3] = np.rint(rgb * 255)
+    res[..., 3:] = np.rint(alpha * 255)
+
+    return res
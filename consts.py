@@ -1,6 +1,9 @@
+import os
+
 from point import Point
 
 COLOR_GRID = 'gray95'
+GRID_MIN_STEP = 5
 COLOR_FRAME = 'lightblue'
 COLOR_OUTLINE = 'black'
 COLOR_CUBIC = 'blue'
@@ -9,6 +12,8 @@ COLOR_ARC = 'magenta'
 COLOR_INT_POINT = 'orange'
 COLOR_END_POINT = 'red'
 COLOR_CONNECTOR = 'violet'
+COLOR_DIFF = 'red'
+COLOR_UNMATCHED = 'black'
 
 DIR_LEFT = Point(-1, 0)
 DIR_RIGHT = Point(1, 0)
@@ -16,4 +21,35 @@ DIR_UP = Point(0, -1)
 DIR_DOWN = Point(0, 1)
 
 SVG_SCALE_DELAY = 500
+SVG_PREVIEW_DELAY = 16
 SVG_OPACITY_DELAY = 200
+MOVE_FRAME_DELAY = 16
+MOVE_END_DELAY = 200
+
+RASTER_CACHE_BUDGET = 512 * 2 ** 20
+DISK_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'svg-comparator')
+DISK_CACHE_BUDGET = 2 * 2 ** 30
+DISK_CACHE_RESCAN_FRACTION = 16
+WORKERS_POLL_DELAY = 20
+
+POINTS_LOD_LIMIT = 5000
+POINTS_LOD_RADIUS = 2
+
+HOVER_RADIUS = 5
+DEVIATION_MATCH_RADIUS = 5
+DEVIATION_POINT_RADIUS = 2
+
+ALIGN_COARSE_SIZE = 256
+ALIGN_POINTS_ITERATIONS = 50
+
+PERF_ENABLED = os.environ.get('SVG_COMPARATOR_PERF') == '1'
+PERF_MAX_EVENTS = 10000
+PERF_OVERLAY_DELAY = 500
+
+EXPORT_TILE_PIXELS = 2 ** 20
+EXPORT_IDAT_SIZE = 2 ** 20
+
+WATCH_POLL_DELAY = 250
+PATH_CACHE_BUDGET = 64 * 2 ** 20
+
+LAYERS_COMPARISON_LINES = 2
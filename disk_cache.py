@@ -0,0 +1,164 @@
+import json
+import os
+from uuid import uuid4
+
+import numpy as np
+
+from consts import DISK_CACHE_BUDGET, DISK_CACHE_DIR, DISK_CACHE_RESCAN_FRACTION
+
+GEOMETRY_ARRAYS = ('end_points', 'int_points', 'connectors', 'segments')
+
+
+class DiskCache:
+    def __init__(self, directory, budget):
+        self.directory = directory
+        self.budget = budget
+        self.size = None
+        self.written = 0
+
+    def get_geometry(self, key, version):
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'meta.json')) as file:
+                meta = json.load(file)
+            if meta['version'] != version:
+                return None
+
+            geometry = {name: np.load(os.path.join(entry, f'{name}.npy')) for name in GEOMETRY_ARRAYS}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        _touch(os.path.join(entry, 'meta.json'))
+        geometry['cmd_quans'] = meta['cmd_quans']
+        geometry['view_box'] = meta['view_box']
+
+        return geometry
+
+    def put_geometry(self, key, version, geometry):
+        entry = self._entry(key)
+        try:
+            os.makedirs(entry, exist_ok=True)
+            for name in GEOMETRY_ARRAYS:
+                _save(os.path.join(entry, f'{name}.npy'), geometry[name])
+
+            meta = {'version': version, 'cmd_quans': geometry['cmd_quans'], 'view_box': geometry['view_box']}
+            _write(os.path.join(entry, 'meta.json'), lambda file: file.write(json.dumps(meta).encode()))
+        except OSError:
+            return
+
+        self._added(sum(geometry[name].nbytes for name in GEOMETRY_ARRAYS))
+
+    def get_raster(self, key, version, scale):
+        path = self._raster_path(key, version, scale)
+        try:
+            raster = np.load(path)
+        except (OSError, ValueError):
+            return None
+
+        _touch(path)
+        return raster
+
+    def put_raster(self, key, version, scale, raster):
+        try:
+            os.makedirs(self._entry(key), exist_ok=True)
+            _save(self._raster_path(key, version, scale), raster)
+        except OSError:
+            return
+
+        self._added(raster.nbytes)
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def _raster_path(self, key, version, scale):
+        return os.path.join(self._entry(key), f'raster-{version}-{scale:g}.npy')
+
+    def _added(self, size):
+        if self.size is None:
+            self._evict()
+            return
+
+        self.size += size
+        self.written += size
+        if self.size > self.budget or self.written > self.budget / DISK_CACHE_RESCAN_FRACTION:
+            self._evict()
+
+    def _evict(self):
+        self.written = 0
+
+        units = []
+        size = 0
+        try:
+            for entry in os.scandir(self.directory):
+                if not entry.is_dir():
+                    continue
+
+                geometry_files = []
+                geometry_size = 0
+                geometry_time = 0
+                for file in os.scandir(entry.path):
+                    stat = file.stat()
+                    size += stat.st_size
+                    if file.name.startswith('raster-'):
+                        units.append((stat.st_mtime, stat.st_size, [file.path]))
+                        continue
+
+                    geometry_files.append(file.path)
+                    geometry_size += stat.st_size
+                    if file.name == 'meta.json':
+                        geometry_time = stat.st_mtime
+
+                if len(geometry_files) > 0:
+                    units.append((geometry_time, geometry_size, geometry_files))
+        except OSError:
+            return
+
+        self.size = size
+        if size <= self.budget:
+            return
+
+        for _, unit_size, paths in sorted(units):
+            if size <= self.budget:
+                break
+
+            for path in paths:
+                _remove(path)
+            size -= unit_size
+            self.size = size
+
+            try:
+                os.rmdir(os.path.dirname(paths[0]))
+            except OSError:
+                pass
+
+
+def _save(path, array):
+    _write(path, lambda file: np.save(file, np.ascontiguousarray(array)))
+
+
+def _write(path, write):
+    tmp_path = f'{path}.{uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'wb') as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except OSError:
+        _remove(tmp_path)
+        raise
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+disk_cache = DiskCache(DISK_CACHE_DIR, DISK_CACHE_BUDGET)
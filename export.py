@@ -0,0 +1,156 @@
+import os
+import re
+import struct
+import zlib
+from collections import deque
+
+import numpy as np
+
+from compositor import Compositor
+from consts import EXPORT_IDAT_SIZE, EXPORT_TILE_PIXELS
+from svg import render_alpha, tint
+
+_SVG_TAG = re.compile(rb'<svg\b[^>]*>')
+_VIEW_BOX = re.compile(rb'\sviewBox\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+_SIZE_ATTRS = re.compile(rb'\s(?:width|height|viewBox|preserveAspectRatio)\s*=\s*(?:"[^"]*"|\'[^\']*\')')
+
+
+class PngWriter:
+    def __init__(self, file, width, height):
+        self.file = file
+        self.compressor = zlib.compressobj()
+        self.buffer = []
+        self.buffer_size = 0
+
+        file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def write_rows(self, pixels):
+        rows = np.empty((pixels.shape[0], 1 + pixels.shape[1] * 4), dtype=np.uint8)
+        rows[:, 0] = 0
+        rows[:, 1:] = pixels.reshape(pixels.shape[0], -1)
+        self._add(self.compressor.compress(rows.tobytes()))
+
+    def close(self):
+        self._add(self.compressor.flush())
+        self._flush()
+        self._chunk(b'IEND', b'')
+
+    def _add(self, data):
+        self.buffer.append(data)
+        self.buffer_size += len(data)
+        if self.buffer_size >= EXPORT_IDAT_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer_size > 0:
+            self._chunk(b'IDAT', b''.join(self.buffer))
+            self.buffer.clear()
+            self.buffer_size = 0
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)) + kind + data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+
+class TiledExport:
+    def __init__(self, filename, layers, executor, window):
+        self.layers = layers
+        self.executor = executor
+        self.window = window
+
+        layers[:] = [layer for layer in layers if layer['width'] > 0 and layer['height'] > 0]
+        if len(layers) == 0:
+            raise ValueError('The visible layers have no area to export')
+
+        x0, y0 = min(layer['x'] for layer in layers), min(layer['y'] for layer in layers)
+        for layer in layers:
+            layer['x'] -= x0
+            layer['y'] -= y0
+        self.width = max(layer['x'] + layer['width'] for layer in layers)
+        self.height = max(layer['y'] + layer['height'] for layer in layers)
+
+        rows = max(1, EXPORT_TILE_PIXELS // self.width)
+        self.strips = [(y, min(rows, self.height - y)) for y in range(0, self.height, rows)]
+        self.next_strip = 0
+        self.written = 0
+        self.pending = deque()
+
+        self.file = open(filename, 'wb')
+        self.writer = PngWriter(self.file, self.width, self.height)
+
+    def poll(self):
+        while len(self.pending) > 0 and self.pending[0].done():
+            try:
+                self.writer.write_rows(self.pending.popleft().result())
+            except BaseException:
+                self.cancel()
+                raise
+            self.written += 1
+
+        while len(self.pending) < self.window and self.next_strip < len(self.strips):
+            y, height = self.strips[self.next_strip]
+            self.pending.append(self.executor.submit(render_strip, self.layers, y, self.width, height))
+            self.next_strip += 1
+
+        if self.written < len(self.strips):
+            return False
+
+        self.writer.close()
+        self.file.close()
+        return True
+
+    def cancel(self):
+        for future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.file.close()
+        os.remove(self.file.name)
+
+
+def export_layers(svgs, scale, view_scale):
+    return [{
+        'data': svg.data,
+        'x': round(svg.lt_pos.x * scale / view_scale),
+        'y': round(svg.lt_pos.y * scale / view_scale),
+        'width': round(scale * svg.width),
+        'height': round(scale * svg.height),
+        'color': svg.color,
+        'opacity': svg.opacity,
+    } for svg in svgs if svg.visible]
+
+
+def render_strip(layers, y, width, height):
+    compositor = Compositor()
+    compositor.resize(width, height)
+
+    for idx, layer in enumerate(layers):
+        x0, y0 = max(0, layer['x']), max(y, layer['y'])
+        x1, y1 = min(width, layer['x'] + layer['width']), min(y + height, layer['y'] + layer['height'])
+        if x1 <= x0 or y1 <= y0:
+            continue
+
+        data = _crop_svg(layer['data'], x0 - layer['x'], y0 - layer['y'],
+                         x1 - x0, y1 - y0, layer['width'], layer['height'])
+        alpha = render_alpha(data, x1 - x0, y1 - y0)
+        compositor.set_layer(idx, tint(alpha, layer['color'], layer['opacity']), x0, y0 - y)
+
+    compositor.set_order(range(len(layers)))
+    return compositor.composite()
+
+
+def _crop_svg(data, x, y, width, height, full_width, full_height):
+    tag = _SVG_TAG.search(data)
+    view_box = _VIEW_BOX.search(tag.group())
+    if view_box is None:
+        vb_x, vb_y, vb_width, vb_height = 0, 0, full_width, full_height
+    else:
+        view_box = (view_box.group(1) or view_box.group(2)).replace(b',', b' ')
+        vb_x, vb_y, vb_width, vb_height = map(float, view_box.split())
+
+    x_factor, y_factor = vb_width / full_width, vb_height / full_height
+    crop = (f' viewBox="{vb_x + x * x_factor:.10g} {vb_y + y * y_factor:.10g}'
+            f' {width * x_factor:.10g} {height * y_factor:.10g}"'
+            f' width="{width}" height="{height}" preserveAspectRatio="none"').encode()
+
+    return data[:tag.start()] + b'<svg' + crop + _SIZE_ATTRS.sub(b'', tag.group()[4:]) + data[tag.end():]
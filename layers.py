@@ -0,0 +1,86 @@
+class LayerList:
+    def __init__(self):
+        self.svgs = []
+        self.idxs = {}
+        self.filenames = {}
+        self.selected_ids = set()
+        self.subscribers = []
+        self.stale_from = None
+
+    def __len__(self):
+        return len(self.svgs)
+
+    def __iter__(self):
+        return iter(self.svgs)
+
+    def __getitem__(self, idx):
+        return self.svgs[idx]
+
+    def __contains__(self, svg):
+        return svg.id in self.idxs and self.svgs[self.idx(svg)] is svg
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def idx(self, svg):
+        idx = self.idxs[svg.id]
+        if self.stale_from is not None and idx >= self.stale_from:
+            self._reindex(self.stale_from, len(self.svgs))
+            self.stale_from = None
+            idx = self.idxs[svg.id]
+
+        return idx
+
+    def by_filename(self, filename):
+        return self.filenames.get(filename)
+
+    def append(self, svg, selected=True):
+        self.idxs[svg.id] = len(self.svgs)
+        self.filenames[svg.filename] = svg
+        self.svgs.append(svg)
+        if selected:
+            self.selected_ids.add(svg.id)
+
+        self._notify('insert', svg, len(self.svgs) - 1, len(self.svgs))
+
+    def remove(self, svg):
+        idx = self.idx(svg)
+        self.idxs.pop(svg.id)
+        self.svgs.pop(idx)
+        self.filenames.pop(svg.filename)
+        self.selected_ids.discard(svg.id)
+        self.stale_from = idx if self.stale_from is None else min(self.stale_from, idx)
+
+        self._notify('remove', svg, idx, len(self.svgs))
+
+    def swap(self, idx1, idx2):
+        idx1, idx2 = min(idx1, idx2), max(idx1, idx2)
+        self.svgs[idx1], self.svgs[idx2] = self.svgs[idx2], self.svgs[idx1]
+        self._reindex(idx1, idx1 + 1)
+        self._reindex(idx2, idx2 + 1)
+
+        self._notify('swap', self.svgs[idx1], idx1, idx2 + 1)
+
+    def update(self, svg):
+        idx = self.idx(svg)
+        self._notify('update', svg, idx, idx + 1)
+
+    def is_selected(self, svg):
+        return svg.id in self.selected_ids
+
+    def set_selected(self, svg, selected):
+        if selected:
+            self.selected_ids.add(svg.id)
+        else:
+            self.selected_ids.discard(svg.id)
+
+    def selected(self):
+        return [svg for svg in self.svgs if svg.id in self.selected_ids]
+
+    def _reindex(self, start, stop):
+        for idx in range(start, stop):
+            self.idxs[self.svgs[idx].id] = idx
+
+    def _notify(self, event, svg, start, stop):
+        for callback in self.subscribers:
+            callback(event, svg, start, stop)
@@ -0,0 +1,232 @@
+import os
+import tkinter as tk
+from tkinter import font, ttk
+
+from bindtags import add_layers_canvas_tag
+from consts import LAYERS_COMPARISON_LINES
+
+
+class LayersPanel:
+    def __init__(self, parent, layers, toggle_selection, toggle_visibility, move_up, move_down, set_color,
+                 set_opacity, close):
+        self.layers = layers
+        self.actions = {
+            'toggle_selection': toggle_selection,
+            'toggle_visibility': toggle_visibility,
+            'move_up': move_up,
+            'move_down': move_down,
+            'set_color': set_color,
+            'set_opacity': set_opacity,
+            'close': close,
+        }
+
+        self.frame = tk.Frame(parent)
+        add_layers_canvas_tag(self.frame)
+        self.canvas = tk.Canvas(self.frame)
+        add_layers_canvas_tag(self.canvas)
+        self.vscrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.hscrollbar = tk.Scrollbar(self.frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        self.canvas.configure(yscrollcommand=self.on_yscroll)
+        self.canvas.configure(xscrollcommand=self.hscrollbar.set)
+
+        self.hscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.vscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        self.bold_font = font.Font(weight='bold')
+        self.rows = []
+        self.stats = {}
+        self.comparisons = {}
+        self.binding = False
+
+        self.row_height = self._measure_row_height()
+
+        self.canvas.bind('<Configure>', lambda _: self.update_rows())
+        self.canvas.bind_class('LayersCanvas', '<MouseWheel>', self.on_vscroll)
+        self.canvas.bind_class('LayersCanvas', '<Shift-MouseWheel>', self.on_hscroll)
+        layers.subscribe(self.on_layers_changed)
+
+    def on_layers_changed(self, event, svg, start, stop):
+        if event == 'remove':
+            self.stats.pop(svg.id, None)
+            self.comparisons.pop(svg.id, None)
+        elif event == 'update':
+            self.stats.pop(svg.id, None)
+
+        self._update_scrollregion()
+        self.update_rows(max(0, start - 1), stop)
+
+    def on_yscroll(self, first, last):
+        self.vscrollbar.set(first, last)
+        self.update_rows()
+
+    def on_vscroll(self, event):
+        self.canvas.yview_scroll(-event.delta, 'units')
+
+    def on_hscroll(self, event):
+        self.canvas.xview_scroll(-event.delta, 'units')
+
+    def set_comparison(self, svg, text):
+        if text is None:
+            self.comparisons.pop(svg.id, None)
+        else:
+            self.comparisons[svg.id] = text
+
+        if svg in self.layers:
+            for row in self.rows:
+                if row.svg is svg:
+                    self._bind_row(row, self.layers.idx(svg))
+
+    def update_rows(self, start=0, stop=None):
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.row_height))
+        last = min(len(self.layers), int((top + self.canvas.winfo_height()) // self.row_height) + 1)
+
+        while len(self.rows) < last - first:
+            self.rows.append(self._create_row())
+
+        stop = len(self.layers) if stop is None else stop
+        for row_idx, row in enumerate(self.rows):
+            idx = first + row_idx
+            if idx >= last:
+                if row.svg is not None:
+                    row.svg = row.idx = None
+                    self.canvas.itemconfigure(row.window, state=tk.HIDDEN)
+                continue
+
+            if row.idx != idx or row.svg is not self.layers[idx] or start <= idx < stop:
+                self._bind_row(row, idx)
+
+    def _bind_row(self, row, idx):
+        svg = self.layers[idx]
+        row.svg, row.idx = svg, idx
+        self.binding = True
+
+        row.idx_label.configure(text=f'#{idx + 1}')
+        row.selected.set(self.layers.is_selected(svg))
+        row.eye_button.configure(text=('👁' if svg.visible else '🚫'))
+        row.up_button['state'] = tk.NORMAL if idx > 0 else tk.DISABLED
+        row.down_button['state'] = tk.NORMAL if idx < len(self.layers) - 1 else tk.DISABLED
+        row.opacity_scale.set(svg.opacity)
+        row.opacity_label.configure(text=str(int(svg.opacity * 100)))
+
+        directory, name, stats = self._stats(svg)
+        row.directory_label.configure(text=directory)
+        row.name_label.configure(text=name)
+        comparison = self.comparisons.get(svg.id)
+        row.stats_label.configure(text=_stats_text(stats, comparison))
+
+        self.canvas.coords(row.window, 0, idx * self.row_height)
+        self.canvas.itemconfigure(row.window, state=tk.NORMAL)
+        self.binding = False
+
+    def _stats(self, svg):
+        stats = self.stats.get(svg.id)
+        if stats is None:
+            filename_last_sep = svg.filename.rfind(os.sep)
+            stats = (
+                svg.filename[:filename_last_sep + 1],
+                svg.filename[filename_last_sep + 1:],
+                '\n'.join((
+                    f'End points: {len(svg.end_points)}',
+                    f'Internal points: {len(svg.int_points)}',
+                    '',
+                    f'Commands: {svg.cmd_quans["all"]}',
+                    f'Moves: {svg.cmd_quans["move"]}',
+                    f'Lines: {svg.cmd_quans["line"]}',
+                    f'Cubic beziers: {svg.cmd_quans["cubic"]}',
+                    f'Quadratic beziers: {svg.cmd_quans["quadratic"]}',
+                    f'Arcs: {svg.cmd_quans["arc"]}',
+                )),
+            )
+            self.stats[svg.id] = stats
+
+        return stats
+
+    def _act(self, row, action):
+        svg = row.svg
+        if svg is not None and not self.binding:
+            self.actions[action](svg)
+            if row.svg is svg:
+                self._bind_row(row, row.idx)
+
+    def _set_opacity(self, row, val):
+        if row.svg is not None and not self.binding:
+            row.opacity_label.configure(text=str(int(val * 100)))
+            self.actions['set_opacity'](row.svg, val)
+
+    def _create_row(self):
+        layer_frame = tk.Frame(self.canvas)
+        add_layers_canvas_tag(layer_frame)
+        layer_frame.svg = layer_frame.idx = None
+
+        button_frame = tk.Frame(layer_frame)
+        add_layers_canvas_tag(button_frame)
+
+        layer_frame.idx_label = tk.Label(button_frame)
+        layer_frame.selected = tk.BooleanVar(value=False)
+        tick = tk.Checkbutton(button_frame, variable=layer_frame.selected,
+                              command=lambda: self._act(layer_frame, 'toggle_selection'))
+        layer_frame.eye_button = tk.Button(button_frame, command=lambda: self._act(layer_frame, 'toggle_visibility'))
+        layer_frame.up_button = tk.Button(button_frame, text='🔼', command=lambda: self._act(layer_frame, 'move_up'))
+        layer_frame.down_button = tk.Button(button_frame, text='🔽',
+                                            command=lambda: self._act(layer_frame, 'move_down'))
+        color_button = tk.Button(button_frame, text='🖌️', command=lambda: self._act(layer_frame, 'set_color'))
+        close_button = tk.Button(button_frame, text='❌', command=lambda: self._act(layer_frame, 'close'))
+
+        for widget in (layer_frame.idx_label, tick, layer_frame.eye_button, layer_frame.up_button,
+                       layer_frame.down_button, color_button, close_button):
+            add_layers_canvas_tag(widget)
+            widget.pack(side=tk.TOP)
+
+        button_frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
+
+        opacity_frame = tk.Frame(layer_frame)
+        add_layers_canvas_tag(opacity_frame)
+
+        layer_frame.opacity_label = tk.Label(opacity_frame, anchor=tk.N, width=3)
+        add_layers_canvas_tag(layer_frame.opacity_label)
+        layer_frame.opacity_scale = ttk.Scale(opacity_frame, orient=tk.VERTICAL, from_=0, to=1,
+                                              command=lambda val: self._set_opacity(layer_frame, float(val)))
+        add_layers_canvas_tag(layer_frame.opacity_scale)
+
+        layer_frame.opacity_scale.pack(side=tk.TOP, fill=tk.Y, expand=True)
+        layer_frame.opacity_label.pack(side=tk.TOP, fill=tk.X, expand=False)
+
+        opacity_frame.pack(side=tk.LEFT, fill=tk.Y, expand=False)
+
+        description_frame = tk.Frame(layer_frame)
+        add_layers_canvas_tag(description_frame)
+
+        layer_frame.directory_label = tk.Label(description_frame, font=self.bold_font, anchor=tk.W)
+        layer_frame.name_label = tk.Label(description_frame, font=self.bold_font, anchor=tk.W)
+        layer_frame.stats_label = tk.Label(description_frame, anchor=tk.W, justify=tk.LEFT)
+        for label in (layer_frame.directory_label, layer_frame.name_label, layer_frame.stats_label):
+            add_layers_canvas_tag(label)
+            label.pack(side=tk.TOP, fill=tk.X, expand=True)
+
+        description_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        layer_frame.window = self.canvas.create_window(0, 0, window=layer_frame, anchor=tk.NW, state=tk.HIDDEN)
+        layer_frame.bind('<Configure>', lambda _: self._update_scrollregion())
+
+        return layer_frame
+
+    def _measure_row_height(self):
+        row = self._create_row()
+        row.stats_label.configure(text=_stats_text('\n' * 12, '\n' * (LAYERS_COMPARISON_LINES - 1)))
+        row.update_idletasks()
+        height = max(row.winfo_reqheight(), 1) + 10
+
+        self.canvas.delete(row.window)
+        row.destroy()
+
+        return height
+
+    def _update_scrollregion(self):
+        width = max([row.winfo_width() for row in self.rows if row.svg is not None], default=0)
+        self.canvas.configure(scrollregion=(0, 0, width, len(self.layers) * self.row_height))
+
+
+def _stats_text(stats, comparison):
+    return stats if comparison is None else f'{stats}\n\n{comparison}'
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+from consts import PERF_ENABLED, PERF_MAX_EVENTS
+
+
+class Perf:
+    def __init__(self, enabled, max_events):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.stages = {}
+        self.counters = defaultdict(int)
+
+    def stage(self, name, **args):
+        if not self.enabled:
+            return _NULL_STAGE
+
+        return _Stage(self, name, args)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def record(self, name, start, duration, args, pid=None):
+        self.events.append({'name': name, 'start': start, 'duration': duration, 'args': args,
+                            'pid': pid or os.getpid()})
+
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = {'count': 0, 'total': 0, 'max': 0, 'last': 0, 'args': {}}
+        stats['count'] += 1
+        stats['total'] += duration
+        stats['max'] = max(stats['max'], duration)
+        stats['last'] = duration
+        stats['args'] = args
+
+    def reset(self):
+        self.events.clear()
+        self.stages.clear()
+        self.counters.clear()
+
+    def unwrap(self, result):
+        if not isinstance(result, TracedResult):
+            return result
+
+        for event in result.events:
+            self.record(**event)
+        for name, n in result.counters.items():
+            self.count(name, n)
+
+        return result.value
+
+    def summary(self):
+        return {'stages': self.stages, 'counters': dict(self.counters)}
+
+    def write_json(self, file):
+        json.dump({**self.summary(), 'events': [*self.events]}, file, indent=2)
+
+    def write_chrome_trace(self, file):
+        trace_events = [{'name': event['name'], 'ph': 'X', 'ts': event['start'] * 1e6,
+                         'dur': event['duration'] * 1e6, 'pid': event['pid'], 'tid': event['pid'],
+                         'args': event['args']} for event in self.events]
+        trace_events.append({'name': 'counters', 'ph': 'C', 'ts': time.perf_counter() * 1e6,
+                             'pid': os.getpid(), 'args': dict(self.counters)})
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, file)
+
+    def format_summary(self):
+        lines = [f'{"stage":<24}{"n":>6}{"last ms":>10}{"avg ms":>10}{"max ms":>10}']
+        for name, stats in sorted(self.stages.items()):
+            lines.append(f'{name:<24}{stats["count"]:>6}{stats["last"] * 1000:>10.1f}'
+                         f'{stats["total"] / stats["count"] * 1000:>10.1f}{stats["max"] * 1000:>10.1f}')
+        for name, n in sorted(self.counters.items()):
+            lines.append(f'{name:<24}{n:>6}')
+
+        return '\n'.join(lines)
+
+
+class TracedResult:
+    def __init__(self, value, events, counters):
+        self.value = value
+        self.events = events
+        self.counters = counters
+
+
+class _Stage:
+    def __init__(self, perf, name, args):
+        self.perf = perf
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.args
+
+    def __exit__(self, *exc_info):
+        self.perf.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+
+
+class _IgnoredArgs(dict):
+    def __setitem__(self, key, value):
+        pass
+
+
+_NULL_STAGE = nullcontext(_IgnoredArgs())
+
+
+def traced(fn, *args):
+    enabled = perf.enabled
+    perf.enabled = True
+    perf.reset()
+    try:
+        value = fn(*args)
+        return TracedResult(value, [*perf.events], dict(perf.counters))
+    finally:
+        perf.enabled = enabled
+        perf.reset()
+
+
+perf = Perf(PERF_ENABLED, PERF_MAX_EVENTS)
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+from consts import RASTER_CACHE_BUDGET
+from perf import perf
+
+
+class RasterCache:
+    def __init__(self, budget):
+        self.budget = budget
+        self.size = 0
+        self.rasters = OrderedDict()
+        self.hidden = set()
+
+    def get(self, key, scale):
+        raster = self.rasters.get((key, scale))
+        perf.count('raster_cache.hit' if raster is not None else 'raster_cache.miss')
+        if raster is not None:
+            self.rasters.move_to_end((key, scale))
+
+        return raster
+
+    def nearest(self, key, scale):
+        scales = [s for k, s in self.rasters if k == key]
+        if len(scales) == 0:
+            return None, None
+
+        nearest_scale = min(scales, key=lambda s: (abs(s - scale), -s))
+        return self.get(key, nearest_scale), nearest_scale
+
+    def put(self, key, scale, raster):
+        self._pop((key, scale))
+        self.rasters[(key, scale)] = raster
+        self.size += raster.nbytes
+        self._evict(keep=(key, scale))
+
+    def set_hidden(self, key, hidden):
+        if hidden:
+            self.hidden.add(key)
+        else:
+            self.hidden.discard(key)
+
+    def drop(self, key):
+        for cached_key in [k for k in self.rasters if k[0] == key]:
+            self._pop(cached_key)
+        self.hidden.discard(key)
+
+    def _pop(self, cached_key):
+        raster = self.rasters.pop(cached_key, None)
+        if raster is not None:
+            self.size -= raster.nbytes
+
+    def _evict(self, keep):
+        while self.size > self.budget:
+            victims = [k for k in self.rasters if k != keep]
+            if len(victims) == 0:
+                return
+
+            hidden_victims = [k for k in victims if k[0] in self.hidden]
+            self._pop((hidden_victims or victims)[0])
+
+
+raster_cache = RasterCache(RASTER_CACHE_BUDGET)
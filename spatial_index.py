@@ -0,0 +1,35 @@
+import numpy as np
+
+
+class SpatialIndex:
+    def __init__(self, end_points, int_points):
+        from scipy.spatial import cKDTree
+
+        self.end_count = len(end_points)
+        self.points = np.vstack((end_points, int_points))
+        self.tree = cKDTree(self.points)
+
+    def nearest(self, x, y, max_distance=np.inf):
+        if len(self.points) == 0:
+            return None
+
+        distance, idx = self.tree.query((x, y), distance_upper_bound=max_distance)
+        if idx == len(self.points):
+            return None
+
+        return distance, *self._split(idx)
+
+    def nearest_many(self, points, max_distance=np.inf):
+        if len(self.points) == 0:
+            return np.full(len(points), np.inf), np.full(len(points), -1)
+
+        distances, idxs = self.tree.query(points, distance_upper_bound=max_distance, workers=-1)
+        idxs[idxs == len(self.points)] = -1
+
+        return distances, idxs
+
+    def _split(self, idx):
+        if idx < self.end_count:
+            return 'end', idx
+
+        return 'int', idx - self.end_count
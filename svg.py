@@ -1,110 +1,151 @@
+import os
+from collections import OrderedDict
+from hashlib import sha1
 from io import BytesIO
 from uuid import uuid4
 
-import cairosvg
-from PIL import Image, ImageEnhance
-from svgpathtools import svg2paths, svg2paths2, CubicBezier, QuadraticBezier
+import numpy as np
 
-from point import complex_to_point, Point
+from consts import PATH_CACHE_BUDGET
+from disk_cache import disk_cache
+from perf import perf
+from point import Point
+from spatial_index import SpatialIndex
+from svg_parser import PARSER_VERSION, PathCache, parse_svg
 
 
 class Svg:
-    def __init__(self, filename):
+    def __init__(self, filename, path_cache=None, source=None):
         self.filename = filename
         self.id = uuid4().hex
-        self.int_points = []
-        self.end_points = []
+        self.key = None
+        self.data = None
+        self.stat = None
+        self.int_points = np.empty((0, 2))
+        self.end_points = np.empty((0, 2))
+        self.connectors = np.empty((0, 2), dtype=np.int64)
+        self.segments = np.empty((0, 4))
+        self.index = None
         self.cmd_quans = {'all': 0, 'move': 0, 'line': 0, 'cubic': 0, 'quadratic': 0, 'arc': 0}
         self.width = 0
         self.height = 0
         self.lt_pos = Point(0, 0)
         self.visible = True
-        self.png = {'scale': -1, 'bytes': BytesIO()}
         self.opacity = .5
         self.color = (0, 0, 0)
 
-        self._load_points_and_meta()
-
-    def get_png(self, scale):
-        if self.png['scale'] != scale:
-            png_bytes = BytesIO()
-            png_bytes.write(cairosvg.svg2png(file_obj=open(self.filename, 'rb'),
-                                             output_width=scale * self.width,
-                                             output_height=scale * self.height))
-            self.png['scale'] = scale
-            self.png['bytes'] = png_bytes
-
-        self.png['bytes'].seek(0)
-        png_bytes = BytesIO(self.png['bytes'].read())
-
-        res_png_bytes = BytesIO()
-        with Image.open(png_bytes) as png:
-            png_data = png.getdata()
-            new_png_data = []
-            for pixel in png_data:
-                if pixel[3] > 0:
-                    new_png_data.append((*self.color, int(pixel[3] * self.opacity)))
-                else:
-                    new_png_data.append(pixel)
-            png.putdata(new_png_data)
-
-            png.save(res_png_bytes, format='PNG')
-
-        return res_png_bytes.getvalue()
-
-    def _load_points_and_meta(self):
-        svg, code, meta = svg2paths2(self.filename)
-
-        for path in svg:
-            for segment in path:
-                start = complex_to_point(segment.start)
-                end = complex_to_point(segment.end)
-
-                if len(self.end_points) == 0 or self.end_points[-1] != start:
-                    self.end_points.append(start)
-                self.end_points.append(end)
-
-                if type(segment) is CubicBezier:
-                    control1 = complex_to_point(segment.control1)
-                    control1.whose = [start]
-                    control2 = complex_to_point(segment.control2)
-                    control2.whose = [end]
-
-                    self.int_points.append(control1)
-                    self.int_points.append(control2)
-
-                elif type(segment) is QuadraticBezier:
-                    control = complex_to_point(segment.control)
-                    control.whose = [start, end]
-
-                    self.int_points.append(control)
-
-        for line in code:
-            cmds = line.get('d')
-
-            if cmds is None:
-                continue
-
-            for cmd in cmds.split():
-                if len(cmd) > 1 and not cmd[1].isdigit():
-                    continue
-
-                cmd_cut = cmd.lower()[0]
-                if cmd_cut == 'm':
-                    self.cmd_quans['move'] += 1
-                    self.cmd_quans['all'] += 1
-                elif cmd_cut == 'l' or cmd_cut == 'v' or cmd_cut == 'h':
-                    self.cmd_quans['line'] += 1
-                    self.cmd_quans['all'] += 1
-                elif cmd_cut == 'c':
-                    self.cmd_quans['cubic'] += 1
-                    self.cmd_quans['all'] += 1
-                elif cmd_cut == 'q':
-                    self.cmd_quans['quadratic'] += 1
-                    self.cmd_quans['all'] += 1
-                elif cmd_cut == 'a':
-                    self.cmd_quans['arc'] += 1
-                    self.cmd_quans['all'] += 1
-
-        xlt, ylt, xrb, yrb = map(int, meta['viewBox'].split())
+        self._load_points_and_meta(path_cache, source)
+
+    def render_args(self, scale):
+        return self.key, scale, self.data, scale * self.width, scale * self.height
+
+    def _load_points_and_meta(self, path_cache, source):
+        with perf.stage('svg.load', filename=self.filename) as args:
+            self._load_geometry(path_cache, source)
+            args['bytes'] = len(self.data)
+            args['points'] = len(self.end_points) + len(self.int_points)
+
+    def update_geometry(self, other):
+        for name in ('key', 'data', 'stat', 'int_points', 'end_points', 'connectors', 'segments', 'index',
+                     'cmd_quans', 'width', 'height'):
+            setattr(self, name, getattr(other, name))
+
+    def _load_geometry(self, path_cache, source):
+        self.stat, self.data, self.key = read_source(self.filename) if source is None else source
+
+        geometry = disk_cache.get_geometry(self.key, PARSER_VERSION)
+        perf.count('geometry_cache.hit' if geometry is not None else 'geometry_cache.miss')
+        if geometry is None:
+            geometry = parse_svg(BytesIO(self.data), path_cache)
+            geometry['end_points'] = np.frombuffer(geometry['end_points'], dtype=np.float64).reshape(-1, 2)
+            geometry['int_points'] = np.frombuffer(geometry['int_points'], dtype=np.float64).reshape(-1, 2)
+            geometry['connectors'] = np.frombuffer(geometry['connectors'], dtype=np.int64).reshape(-1, 2)
+            geometry['segments'] = np.frombuffer(geometry['segments'], dtype=np.float64).reshape(-1, 4)
+            disk_cache.put_geometry(self.key, PARSER_VERSION, geometry)
+
+        self.end_points = geometry['end_points']
+        self.int_points = geometry['int_points']
+        self.connectors = geometry['connectors']
+        self.segments = geometry['segments']
+        self.index = SpatialIndex(self.end_points, self.int_points)
+
+        self.cmd_quans = geometry['cmd_quans']
+
+        xlt, ylt, xrb, yrb = map(int, geometry['view_box'].split())
         self.width, self.height = xrb - xlt, yrb - ylt
+
+
+def load_svg(filename, scale):
+    svg = Svg(filename)
+    return svg, load_alpha(*svg.render_args(scale))
+
+
+def reload_svg(filename, key, scale):
+    source = read_source(filename)
+    stat, _, new_key = source
+    if new_key == key:
+        return stat, None, None
+
+    previous = _path_caches.pop(filename, None)
+    path_cache = PathCache(previous)
+    svg = Svg(filename, path_cache, source)
+    path_cache.done()
+    _path_caches[filename] = path_cache if len(path_cache.paths) > 0 or previous is None else previous
+
+    size = sum(cache.size for cache in _path_caches.values())
+    while size > PATH_CACHE_BUDGET:
+        size -= _path_caches.popitem(last=False)[1].size
+
+    return stat, svg, load_alpha(*svg.render_args(scale))
+
+
+def read_source(filename):
+    stat = file_stat(filename)
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    return stat, data, sha1(data).hexdigest()
+
+
+def file_stat(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_alpha(key, scale, data, width, height):
+    import cairosvg
+
+    alpha = disk_cache.get_raster(key, cairosvg.__version__, scale)
+    perf.count('disk_raster_cache.hit' if alpha is not None else 'disk_raster_cache.miss')
+    if alpha is None:
+        alpha = render_alpha(data, width, height)
+        disk_cache.put_raster(key, cairosvg.__version__, scale, alpha)
+
+    return alpha
+
+
+def render_alpha(data, width, height):
+    import cairosvg
+    from PIL import Image
+
+    with perf.stage('render.cairosvg', pixels=int(width) * int(height)):
+        png_bytes = BytesIO(cairosvg.svg2png(bytestring=data, output_width=width, output_height=height))
+
+    with perf.stage('render.png_decode', bytes=png_bytes.getbuffer().nbytes), Image.open(png_bytes) as png:
+        return np.array(png.convert('RGBA').getchannel('A'))
+
+
+def tint(alpha, color, opacity):
+    with perf.stage('tint', pixels=alpha.size):
+        pixels = np.empty((*alpha.shape, 4), dtype=np.uint8)
+        pixels[..., :3] = color
+        pixels[..., 3] = (np.arange(256) * opacity).astype(np.uint8)[alpha]
+
+    return pixels
+
+
+_path_caches = OrderedDict()
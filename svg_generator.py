@@ -0,0 +1,70 @@
+import argparse
+
+import numpy as np
+
+SEGMENT_KINDS = ('line', 'cubic', 'quadratic', 'arc')
+
+
+def generate_svg(paths=100, segments=20, mix=None, view_box=(1000, 1000), seed=0):
+    mix = mix or {kind: 1 for kind in SEGMENT_KINDS}
+    kinds = [kind for kind in SEGMENT_KINDS if mix.get(kind, 0) > 0]
+    weights = np.array([mix[kind] for kind in kinds], dtype=np.float64)
+
+    rng = np.random.default_rng(seed)
+    width, height = view_box
+    step = min(width, height) / 20
+
+    path_elements = []
+    for _ in range(paths):
+        pos = rng.random(2) * (width, height)
+        d = [f'M{pos[0]:.3f} {pos[1]:.3f}']
+
+        for kind in rng.choice(kinds, size=segments, p=weights / weights.sum()):
+            points = np.clip(pos + rng.normal(0, step, (3, 2)), 0, (width, height))
+            end = points[-1]
+            if kind == 'line':
+                d.append(f'L{end[0]:.3f} {end[1]:.3f}')
+            elif kind == 'cubic':
+                d.append('C' + ' '.join(f'{x:.3f} {y:.3f}' for x, y in points))
+            elif kind == 'quadratic':
+                d.append('Q' + ' '.join(f'{x:.3f} {y:.3f}' for x, y in points[1:]))
+            else:
+                radius = rng.random() * step + 1
+                d.append(f'A{radius:.3f} {radius:.3f} 0 0 {rng.integers(2)} {end[0]:.3f} {end[1]:.3f}')
+            pos = end
+
+        if rng.random() < .5:
+            d.append('Z')
+        path_elements.append(f'<path d="{"".join(d)}" fill="none" stroke="black"/>')
+
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" '
+            f'width="{width}" height="{height}">\n' + '\n'.join(path_elements) + '\n</svg>\n')
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in SEGMENT_KINDS:
+            raise argparse.ArgumentTypeError(f'Unknown segment kind {kind}')
+        mix[kind] = float(weight or 1)
+
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic SVG for benchmarks.')
+    parser.add_argument('output')
+    parser.add_argument('--paths', type=int, default=100)
+    parser.add_argument('--segments', type=int, default=20, help='segments per path')
+    parser.add_argument('--mix', type=parse_mix, help='segment weights, e.g. line=2,cubic=1')
+    parser.add_argument('--size', type=int, nargs=2, default=(1000, 1000), metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as file:
+        file.write(generate_svg(args.paths, args.segments, args.mix, tuple(args.size), args.seed))
+
+
+if __name__ == '__main__':
+    main()
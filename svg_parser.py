@@ -0,0 +1,262 @@
+import re
+from array import array
+from xml.etree.ElementTree import iterparse
+
+import numpy as np
+
+PARSER_VERSION = 1
+TOKEN_RE = re.compile(r'[MmZzLlHhVvCcSsQqTtAa]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+COMMANDS = set('MmZzLlHhVvCcSsQqTtAa')
+CMD_TYPES = {'M': 'move', 'L': 'line', 'H': 'line', 'V': 'line', 'C': 'cubic', 'S': 'cubic',
+             'Q': 'quadratic', 'T': 'quadratic', 'A': 'arc'}
+
+
+class PathCache:
+    def __init__(self, previous=None):
+        self.previous = previous.paths if previous is not None else {}
+        self.paths = {}
+        self.size = 0
+
+    def parse(self, d, geometry):
+        path = self.paths.get(d)
+        if path is None:
+            path = self.previous.get(d)
+            if path is None:
+                path = _empty_geometry()
+                parse_path_data(d, path)
+
+            self.paths[d] = path
+            self.size += len(d) + sum(len(path[name]) * path[name].itemsize
+                                      for name in ('end_points', 'int_points', 'connectors', 'segments'))
+
+        _extend(geometry, path)
+
+    def done(self):
+        self.previous = {}
+
+
+def parse_svg(source, path_cache=None):
+    geometry = _empty_geometry()
+
+    root = None
+    for event, element in iterparse(source, events=('start', 'end')):
+        if event == 'end':
+            element.clear()
+            root.clear()
+            continue
+
+        if root is None:
+            root = element
+
+        tag = element.tag.rpartition('}')[2]
+        if tag == 'svg' and geometry['view_box'] is None:
+            geometry['view_box'] = element.get('viewBox')
+        elif tag == 'path':
+            if path_cache is None:
+                parse_path_data(element.get('d', ''), geometry)
+            else:
+                path_cache.parse(element.get('d', ''), geometry)
+        elif tag in SHAPES:
+            parse_path_data(SHAPES[tag](element), geometry, count=False)
+
+    return geometry
+
+
+def parse_path_data(d, geometry, count=True):
+    end_points = geometry['end_points']
+    int_points = geometry['int_points']
+    connectors = geometry['connectors']
+    segments = geometry['segments']
+    cmd_quans = geometry['cmd_quans']
+
+    tokens = TOKEN_RE.findall(d)
+    i = 0
+
+    def number():
+        nonlocal i
+        i += 1
+        return float(tokens[i - 1])
+
+    current_pos = start_pos = 0j
+    command = None
+    cubic_control = quad_control = None
+
+    while i < len(tokens):
+        if tokens[i] in COMMANDS:
+            command = tokens[i]
+            i += 1
+        elif command is None:
+            raise ValueError(f'Unallowed implicit command in {d}, position {i}')
+
+        absolute = command.isupper()
+        cmd = command.upper()
+        offset = 0j if absolute else current_pos
+
+        if count and cmd in CMD_TYPES:
+            cmd_quans[CMD_TYPES[cmd]] += 1
+            cmd_quans['all'] += 1
+
+        if cmd == 'Z':
+            if current_pos != start_pos:
+                end_points.extend((current_pos.real, current_pos.imag, start_pos.real, start_pos.imag))
+                segments.extend(_bbox((current_pos, start_pos)))
+            current_pos = start_pos
+            command = None
+            cubic_control = quad_control = None
+            continue
+
+        if cmd == 'M':
+            current_pos = start_pos = offset + complex(number(), number())
+            command = 'L' if absolute else 'l'
+            cubic_control = quad_control = None
+            continue
+
+        if cmd == 'L':
+            end = offset + complex(number(), number())
+        elif cmd == 'H':
+            end = complex(number() + offset.real, current_pos.imag)
+        elif cmd == 'V':
+            end = complex(current_pos.real, number() + offset.imag)
+        elif cmd == 'A':
+            radius = max(abs(number()), abs(number()))
+            i += 1
+            _split_flag(tokens, i)
+            _split_flag(tokens, i + 1)
+            i += 2
+            end = offset + complex(number(), number())
+            reach = 2 * max(radius, abs(end - current_pos) / 2)
+        elif cmd == 'C' or cmd == 'S':
+            if cmd == 'C':
+                control1 = offset + complex(number(), number())
+            elif cubic_control is None:
+                control1 = current_pos
+            else:
+                control1 = 2 * current_pos - cubic_control
+            control2 = offset + complex(number(), number())
+            end = offset + complex(number(), number())
+        elif cmd == 'Q' or cmd == 'T':
+            if cmd == 'Q':
+                control = offset + complex(number(), number())
+            elif quad_control is None:
+                control = current_pos
+            else:
+                control = 2 * current_pos - quad_control
+            end = offset + complex(number(), number())
+
+        end_points.extend((current_pos.real, current_pos.imag, end.real, end.imag))
+        start_idx, end_idx = len(end_points) // 2 - 2, len(end_points) // 2 - 1
+        int_idx = len(int_points) // 2
+
+        if cmd == 'C' or cmd == 'S':
+            int_points.extend((control1.real, control1.imag, control2.real, control2.imag))
+            connectors.extend((int_idx, start_idx, int_idx + 1, end_idx))
+            segments.extend(_bbox((current_pos, control1, control2, end)))
+            cubic_control, quad_control = control2, None
+        elif cmd == 'Q' or cmd == 'T':
+            int_points.extend((control.real, control.imag))
+            connectors.extend((int_idx, start_idx, int_idx, end_idx))
+            segments.extend(_bbox((current_pos, control, end)))
+            cubic_control, quad_control = None, control
+        elif cmd == 'A':
+            segments.extend(_bbox((current_pos, end), reach))
+            cubic_control = quad_control = None
+        else:
+            segments.extend(_bbox((current_pos, end)))
+            cubic_control = quad_control = None
+
+        current_pos = end
+
+
+def _empty_geometry():
+    return {
+        'end_points': array('d'),
+        'int_points': array('d'),
+        'connectors': array('q'),
+        'segments': array('d'),
+        'cmd_quans': {'all': 0, 'move': 0, 'line': 0, 'cubic': 0, 'quadratic': 0, 'arc': 0},
+        'view_box': None,
+    }
+
+
+def _extend(geometry, path):
+    if len(path['connectors']) > 0:
+        offsets = np.array([len(geometry['int_points']) // 2, len(geometry['end_points']) // 2], dtype=np.int64)
+        connectors = np.frombuffer(path['connectors'], dtype=np.int64).reshape(-1, 2) + offsets
+        geometry['connectors'].frombytes(connectors.tobytes())
+
+    for name in ('end_points', 'int_points', 'segments'):
+        geometry[name].extend(path[name])
+    for cmd, quan in path['cmd_quans'].items():
+        geometry['cmd_quans'][cmd] += quan
+
+
+def _bbox(points, reach=0):
+    xs, ys = [p.real for p in points], [p.imag for p in points]
+    return min(xs) - reach, min(ys) - reach, max(xs) + reach, max(ys) + reach
+
+
+def _split_flag(tokens, i):
+    if i < len(tokens) and len(tokens[i]) > 1 and tokens[i][0] in '01':
+        tokens.insert(i + 1, tokens[i][1:])
+        tokens[i] = tokens[i][0]
+
+
+def _points(element):
+    coords = TOKEN_RE.findall(element.get('points', ''))
+    return [*zip(coords[0::2], coords[1::2])]
+
+
+def _polyline_d(element, is_polygon=False):
+    points = _points(element)
+    if len(points) == 0:
+        return ''
+
+    closed = float(points[0][0]) == float(points[-1][0]) and float(points[0][1]) == float(points[-1][1])
+    if is_polygon and closed:
+        points.append(points[0])
+
+    d = 'M' + 'L'.join(f'{x} {y}' for x, y in points)
+    if is_polygon or closed:
+        d += 'z'
+
+    return d
+
+
+def _line_d(element):
+    return f'M{element.get("x1", "0")} {element.get("y1", "0")}L{element.get("x2", "0")} {element.get("y2", "0")}'
+
+
+def _ellipse_d(element):
+    cx, cy = float(element.get('cx', 0)), float(element.get('cy', 0))
+    if element.get('r') is not None:
+        rx = ry = float(element.get('r'))
+    else:
+        rx, ry = float(element.get('rx', 0)), float(element.get('ry', 0))
+
+    return f'M{cx - rx},{cy}a{rx},{ry} 0 1,0 {2 * rx},0a{rx},{ry} 0 1,0 {-2 * rx},0z'
+
+
+def _rect_d(element):
+    x, y = float(element.get('x', 0)), float(element.get('y', 0))
+    w, h = float(element.get('width', 0)), float(element.get('height', 0))
+
+    if element.get('rx') is None and element.get('ry') is None:
+        return f'M{x} {y} L {x + w} {y} L {x + w} {y + h} L {x} {y + h} z'
+
+    rx, ry = element.get('rx'), element.get('ry')
+    rx, ry = float(rx if rx is not None else ry), float(ry if ry is not None else rx)
+
+    return (f'M {x + rx} {y} L {x + w - rx} {y} A {rx} {ry} 0 0 1 {x + w} {y + ry} '
+            f'L {x + w} {y + h - ry} A {rx} {ry} 0 0 1 {x + w - rx} {y + h} '
+            f'L {x + rx} {y + h} A {rx} {ry} 0 0 1 {x} {y + h - ry} '
+            f'L {x} {y + ry} A {rx} {ry} 0 0 1 {x + rx} {y} z')
+
+
+SHAPES = {
+    'polyline': _polyline_d,
+    'polygon': lambda element: _polyline_d(element, is_polygon=True),
+    'line': _line_d,
+    'ellipse': _ellipse_d,
+    'circle': _ellipse_d,
+    'rect': _rect_d,
+}
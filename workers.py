@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from consts import WORKERS_POLL_DELAY
+from perf import perf, traced
+
+
+class Workers:
+    def __init__(self, root):
+        self.root = root
+        self.executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        self.pinned_executor = None
+        self.jobs = {}
+        self.poll_timer_id = None
+
+    def submit(self, owner, tag, callback, fn, *args, on_error=None):
+        def on_done(futures):
+            result = _result(futures[0])
+            if isinstance(result, Exception):
+                if on_error is not None:
+                    on_error(result)
+            elif result is not None:
+                callback(result)
+
+        job = self.jobs.get(owner)
+        if job is not None and job['tag'] == tag:
+            job['callback'] = on_done
+            return
+
+        self._add_job(owner, tag, on_done, None, [self._submit(fn, args)])
+
+    def map(self, owner, callback, fn, args_list, progress=None, pinned=False):
+        executor = self._pinned_executor() if pinned else self.executor
+        self._add_job(owner, None, lambda futures: callback([*map(_result, futures)]), progress,
+                      [self._submit(fn, args, executor) for args in args_list])
+
+    def cancel(self, owner):
+        job = self.jobs.pop(owner, None)
+        if job is not None:
+            for future in job['futures']:
+                future.cancel()
+
+    def _submit(self, fn, args, executor=None):
+        executor = self.executor if executor is None else executor
+        if perf.enabled:
+            return executor.submit(traced, fn, *args)
+
+        return executor.submit(fn, *args)
+
+    def _pinned_executor(self):
+        if self.pinned_executor is None:
+            self.pinned_executor = ProcessPoolExecutor(max_workers=1)
+
+        return self.pinned_executor
+
+    def _add_job(self, owner, tag, callback, progress, futures):
+        self.cancel(owner)
+        self.jobs[owner] = {'tag': tag, 'callback': callback, 'progress': progress, 'futures': futures}
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self.poll_timer_id is None:
+            self.poll_timer_id = self.root.after(WORKERS_POLL_DELAY, self._poll)
+
+    def _poll(self):
+        self.poll_timer_id = None
+
+        try:
+            for owner, job in [*self.jobs.items()]:
+                done = sum(future.done() for future in job['futures'])
+                if job['progress'] is not None:
+                    job['progress'](done, len(job['futures']))
+
+                if done == len(job['futures']):
+                    self.jobs.pop(owner)
+                    job['callback'](job['futures'])
+        finally:
+            if len(self.jobs) > 0:
+                self._schedule_poll()
+
+
+def _result(future):
+    if future.cancelled():
+        return None
+
+    exception = future.exception()
+    if exception is not None:
+        return exception
+
+    return perf.unwrap(future.result())